@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_solver import build_school  # noqa: E402
+from main import generate_student_requests  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def measure(num_students, seed, attempts):
+    school = build_school(num_students, seed)
+    student_requests = generate_student_requests(num_students, seed)
+
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        school.solve(student_requests, max_attempts=attempts)
+    solve_current, solve_peak = tracemalloc.get_traced_memory()
+
+    snapshot = school._snapshot()
+    school.sections = []
+    school.student_sections = {}
+    school.student_masks = {}
+    before = tracemalloc.get_traced_memory()[0]
+    school._restore(snapshot)
+    models = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "students": num_students,
+        "sections": len(school.sections),
+        "solve_peak_mb": solve_peak / MB,
+        "retained_mb": solve_current / MB,
+        "restored_models_mb": models / MB,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure solver memory with tracemalloc."
+    )
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--attempts", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    result = measure(args.students, args.seed, args.attempts)
+    print(
+        f"[Bench] {result['students']} students, {result['sections']} sections, "
+        f"{args.attempts} attempts"
+    )
+    print(f"[Bench] solve peak:       {result['solve_peak_mb']:.1f} MB")
+    print(f"[Bench] retained state:   {result['retained_mb']:.1f} MB")
+    print(f"[Bench] restored models:  {result['restored_models_mb']:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
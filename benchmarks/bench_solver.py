@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from main import generate_student_requests  # noqa: E402
+from src.models import Instructor, Room  # noqa: E402
+from src.scheduler import Scheduler  # noqa: E402
+
+SIZES = [100, 500, 2000, 10000]
+STUDENTS_PER_RESOURCE_SET = 1000
+PHASES = ["planning", "placement", "assignment", "snapshot", "reports"]
+MIN_DELTA = 0.01
+REPEAT = 5
+CONFIRM = 2
+
+
+def build_school(num_students, seed):
+    with open(os.path.join(ROOT, "rooms.json"), "r") as f:
+        room_data = json.load(f)
+    with open(os.path.join(ROOT, "teachers.json"), "r") as f:
+        teacher_data = json.load(f)
+
+    scale = max(1, math.ceil(num_students / STUDENTS_PER_RESOURCE_SET))
+
+    school = Scheduler(seed=seed)
+    for copy_no in range(1, scale + 1):
+        suffix = "" if copy_no == 1 else f"-{copy_no}"
+        school.rooms.extend(
+            Room(
+                number + suffix,
+                data["type"],
+                data["capacity"],
+                data.get("preferred_subjects", []),
+            )
+            for number, data in room_data.items()
+        )
+        school.teachers.extend(
+            Instructor(name + suffix, subjects)
+            for name, subjects in teacher_data.items()
+        )
+    return school
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def bench_size(num_students, seed, strategy="backtrack"):
+    school = build_school(num_students, seed)
+    student_requests = generate_student_requests(num_students, seed)
+    school.student_names = sorted(student_requests.keys())
+
+    results = {}
+    (counts, section_plan), plan_time = timed(school._plan_sections, student_requests)
+    _, build_time = timed(school._build_sections, counts, section_plan)
+    results["planning"] = plan_time + build_time
+
+    candidates = school._sample_patterns()
+    _, results["placement"] = timed(school._place_sections, candidates)
+    assign = getattr(school, school.ASSIGNMENT_STRATEGIES[strategy])
+    _, results["assignment"] = timed(assign, student_requests)
+
+    snapshot, snapshot_time = timed(school._snapshot)
+    _, restore_time = timed(school._restore, snapshot)
+    results["snapshot"] = snapshot_time + restore_time
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        _, results["reports"] = timed(school.save_all_data, output_dir)
+
+    results["total"] = sum(results[p] for p in PHASES)
+    results["sections"] = len(school.sections)
+    results["failed_requests"] = len(school.failed_requests)
+    return results
+
+
+def run_benchmarks(sizes, seed, repeat, strategy="backtrack"):
+    report = {
+        "meta": {
+            "seed": seed,
+            "strategy": strategy,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {},
+    }
+
+    for size in sizes:
+        report["results"][str(size)] = best_of(size, seed, repeat, strategy)
+
+    return report
+
+
+def best_of(size, seed, repeat, strategy, best=None):
+    runs = [bench_size(size, seed, strategy) for _ in range(repeat)]
+    if best:
+        runs.append(best)
+    best = {p: min(r[p] for r in runs) for p in PHASES + ["total"]}
+    best["sections"] = runs[0]["sections"]
+    best["failed_requests"] = runs[0]["failed_requests"]
+
+    print(
+        f"[Bench] {size:>6} students: "
+        + " | ".join(f"{p} {best[p]:.3f}s" for p in PHASES)
+        + f" | total {best['total']:.3f}s"
+    )
+    return best
+
+
+def compare(report, baseline, threshold, min_delta=MIN_DELTA):
+    regressions = []
+    for size, phases in report["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            continue
+        for phase in PHASES + ["total"]:
+            if phase not in base:
+                continue
+            slower = phases[phase] - base[phase]
+            if slower > min_delta and phases[phase] > base[phase] * (1 + threshold):
+                regressions.append(
+                    (
+                        size,
+                        f"{size} students, {phase}: {phases[phase]:.3f}s vs baseline {base[phase]:.3f}s",
+                    )
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the timetable solver.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=REPEAT,
+        help="runs per size; the fastest time of each phase is kept",
+    )
+    parser.add_argument(
+        "--strategy", choices=["backtrack", "forward"], default="backtrack"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a stored results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown against the baseline (0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=MIN_DELTA,
+        help="ignore slowdowns smaller than this many seconds (timer noise)",
+    )
+    parser.add_argument(
+        "--confirm",
+        type=int,
+        default=CONFIRM,
+        help="re-run a regressed size up to this many times before reporting it",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.seed, args.repeat, args.strategy)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+
+        # A single slow run on a busy machine is not a regression; keep
+        # re-running the sizes that look slower until they stay slower.
+        for _ in range(args.confirm):
+            sizes = sorted({size for size, _ in regressions}, key=int)
+            if not sizes:
+                break
+            print(f"[Bench] Re-running {', '.join(sizes)} students to confirm")
+            for size in sizes:
+                report["results"][size] = best_of(
+                    int(size),
+                    args.seed,
+                    args.repeat,
+                    args.strategy,
+                    report["results"][size],
+                )
+            regressions = compare(report, baseline, args.threshold, args.min_delta)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] Results written to {args.output}")
+
+    if regressions:
+        print("[Bench] Regressions over threshold:")
+        for _, line in regressions:
+            print(f"  {line}")
+        return 1
+    if args.baseline:
+        print("[Bench] No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
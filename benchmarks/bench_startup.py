@@ -0,0 +1,92 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+COMMANDS = [
+    ["view-student", "Student_1"],
+    ["view-teacher", "Ms. Anne McAtee"],
+    ["roll", "Maths-1"],
+    ["search", "Student_1"],
+]
+
+
+def timed_run(args, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable] + args,
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"{' '.join(args)} exited with {proc.returncode}: "
+                f"{proc.stderr.decode(errors='replace').strip()}"
+            )
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start latency of the lookup commands."
+    )
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--limit",
+        type=float,
+        default=100.0,
+        help="allowed milliseconds above bare interpreter startup",
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        generated = subprocess.run(
+            [sys.executable, MAIN, "--output-dir", output_dir, "generate"]
+            + ["--students", str(args.students), "--seed", str(args.seed)],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        if generated.returncode != 0:
+            print(f"[Bench] generate failed with exit code {generated.returncode}")
+            return 1
+
+        interpreter = timed_run(["-c", "pass"], args.repeat)
+        print(f"[Bench] interpreter startup: {interpreter * 1000:.1f} ms")
+
+        over = []
+        for command in COMMANDS:
+            try:
+                secs = timed_run(
+                    [MAIN, "--output-dir", output_dir] + command, args.repeat
+                )
+            except RuntimeError as e:
+                print(f"[Bench] {e}")
+                return 1
+            extra = (secs - interpreter) * 1000
+            print(
+                f"[Bench] {' '.join(command):<28} {secs * 1000:6.1f} ms "
+                f"(+{extra:.1f} ms over interpreter)"
+            )
+            if extra > args.limit:
+                over.append(command[0])
+
+    if over:
+        print(f"[Bench] Over the {args.limit:.0f} ms limit: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
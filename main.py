@@ -1,31 +1,53 @@
 import sys
 import os
 import random
-from tabulate import tabulate
-from src.scheduler import Scheduler
+import argparse
+from contextlib import closing
+from src.store import STORE_NAME, read_store
+from src.database import DB_NAME, TimetableDB, teacher_lookup
 from src.utils import (
+    find_student_timetable,
     import_student_timetables,
     import_teacher_timetables,
+    MANIFEST_NAME,
+    read_run_header,
     rebuild_sections_from_file,
+    verify_manifest,
 )
 
 OUTPUT_DIR = "./output"
-OUTPUT_FILES = [
-    os.path.join(OUTPUT_DIR, "roll_calls.txt"),
-    os.path.join(OUTPUT_DIR, "student_timetables.txt"),
-    os.path.join(OUTPUT_DIR, "teacher_timetables.txt"),
+OUTPUT_NAMES = [
+    MANIFEST_NAME,
+    STORE_NAME,
+    STORE_NAME + ".idx",
+    DB_NAME,
+    "roll_calls.txt",
+    "student_timetables.txt",
+    "student_timetables.txt.idx",
+    "teacher_timetables.txt",
+    "run_report.json",
 ]
 
+EXIT_OK = 0
+EXIT_FAILED_REQUESTS = 1
+EXIT_NOT_FOUND = 3
+EXIT_RESOURCE_ERROR = 4
 
-def ensure_output_dir():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
 
+def output_path(name, output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, name)
 
-def delete_output_files():
-    ensure_output_dir()
+
+def ensure_output_dir(output_dir=OUTPUT_DIR):
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+
+def delete_output_files(output_dir=OUTPUT_DIR):
+    ensure_output_dir(output_dir)
     deleted_any = False
-    for path in OUTPUT_FILES:
+    for name in OUTPUT_NAMES:
+        path = output_path(name, output_dir)
         if os.path.exists(path):
             os.remove(path)
             deleted_any = True
@@ -35,6 +57,31 @@ def delete_output_files():
         print("[System] No old output files found to delete.")
 
 
+def load_school(seed=None):
+    from src.scheduler import Scheduler
+
+    school = Scheduler(seed=seed)
+    if not school.load_resources():
+        print("[Error] Could not load rooms/teachers JSON.")
+        return None
+    return school
+
+
+def load_results(school, output_dir=OUTPUT_DIR, read_only=False, **lookup):
+    try:
+        return school.load_store(
+            output_path(STORE_NAME, output_dir), read_only, **lookup
+        )
+    except ValueError as e:
+        print(f"[Error] {e}")
+        return False
+
+
+def open_database(output_dir=OUTPUT_DIR):
+    path = output_path(DB_NAME, output_dir)
+    return TimetableDB(path) if os.path.exists(path) else None
+
+
 def options():
     while True:
         print("\n" + "═" * 40)
@@ -52,149 +99,322 @@ def options():
         choice = input("Select an option (1-7): ").strip()
 
         if choice == "1":
-            delete_output_files()
+            if generate() != EXIT_RESOURCE_ERROR:
+                print("[Success] New files generated and saved.")
 
-            school = Scheduler()
-            if not school.load_resources():
-                print("[Error] Could not load rooms/teachers JSON.")
-                continue
+        elif choice == "2":
+            view_student(input("Enter Student Name: ").strip())
 
-            run(school)
-            print("[Success] New files generated and saved.")
+        elif choice == "3":
+            view_teacher(input("Enter Teacher Name: ").strip())
 
-        elif choice == "2":
-            school = Scheduler()
-            if not school.load_resources():
-                print("[Error] Could not load rooms/teachers JSON.")
-                continue
+        elif choice == "4":
+            view_roll(input("Enter Class ID (e.g., Mat-1): ").strip())
 
-            school.student_schedules = import_student_timetables(
-                os.path.join(OUTPUT_DIR, "student_timetables.txt")
-            )
+        elif choice == "5":
+            import_all()
 
-            name = input("Enter Student Name: ").strip()
-            matches = [
-                k for k in school.student_schedules.keys() if k.lower() == name.lower()
-            ]
+        elif choice == "6":
+            print("\n" + "─" * 30)
+            print("      STUDENT CLASS SEARCH      ")
+            print("─" * 30)
+            search(input("Enter Student Name (e.g., Student_1): ").strip())
 
-            if matches:
-                school.print_timetable(matches[0])
-            else:
-                print(f"No schedule for {name}")
+        elif choice == "7":
+            print("Goodbye!")
+            sys.exit()
 
-        elif choice == "3":
-            school = Scheduler()
-            if not school.load_resources():
-                print("[Error] Could not load rooms/teachers JSON.")
-                continue
 
-            school.teacher_grids = import_teacher_timetables(
-                os.path.join(OUTPUT_DIR, "teacher_timetables.txt")
-            )
+def generate(
+    num_students=None,
+    seed=None,
+    max_attempts=200,
+    workers=1,
+    output_dir=OUTPUT_DIR,
+    profile=None,
+    strategy="backtrack",
+    repair=True,
+    time_budget=None,
+    progress=False,
+    **save_options,
+):
+    delete_output_files(output_dir)
+
+    school = load_school(seed)
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    run(
+        school,
+        num_students,
+        max_attempts,
+        workers,
+        output_dir,
+        profile,
+        strategy,
+        repair,
+        time_budget,
+        progress,
+        **save_options,
+    )
+    return EXIT_FAILED_REQUESTS if school.failed_requests else EXIT_OK
 
-            school.sections = rebuild_sections_from_file(
-                os.path.join(OUTPUT_DIR, "roll_calls.txt"),
-                school.teachers,
-                school.rooms,
-            )
 
-            t_name_input = input("Enter Teacher Name: ").strip()
+def view_student(name, output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
 
-            match = next(
-                (
-                    name
-                    for name in school.teacher_grids.keys()
-                    if name.lower().replace(".", "")
-                    == t_name_input.lower().replace(".", "")
-                ),
-                None,
+    db = open_database(output_dir)
+    if db:
+        with closing(db):
+            match = db.find_student(name)
+            school.student_sections = (
+                {match: db.student_sections(match)} if match else {}
             )
+        school._build_student_schedules()
+    elif load_results(school, output_dir, student=name):
+        school._build_student_schedules(
+            [k for k in school.student_sections if k.lower() == name.lower()]
+        )
+    else:
+        match, schedule = find_student_timetable(
+            output_path("student_timetables.txt", output_dir), name
+        )
+        school.student_schedules = {match: schedule} if match else {}
 
-            if match:
-                school.print_teacher_timetable(match)
-            else:
-                print(f"[Error] No classes found for teacher: {t_name_input}")
+    matches = [k for k in school.student_schedules.keys() if k.lower() == name.lower()]
 
-        elif choice == "4":
-            school = Scheduler()
-            if not school.load_resources():
-                print("[Error] Could not load rooms/teachers JSON.")
-                continue
-
-            school.sections = rebuild_sections_from_file(
-                os.path.join(OUTPUT_DIR, "roll_calls.txt"),
-                school.teachers,
-                school.rooms,
-            )
+    if matches and school.student_schedules[matches[0]] is not None:
+        school.print_timetable(matches[0])
+        return EXIT_OK
+
+    print(f"No schedule for {name}")
+    return EXIT_NOT_FOUND
 
-            class_id = input("Enter Class ID (e.g., Mat-1): ").strip()
-            section = next((s for s in school.sections if s.id == class_id), None)
 
-            if section:
-                print(f"\nROLL FOR {section.subject} ({section.id})")
+def view_teacher(t_name_input, output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
 
-                instr_name = (
-                    section.instructor.name if section.instructor else "Unknown Teacher"
-                )
-                room_num = section.room.number if section.room else "Unknown Room"
+    teacher_names = [t.name for t in school.teachers]
+    match = next(
+        (
+            name
+            for name in teacher_names
+            if teacher_lookup(name) == teacher_lookup(t_name_input)
+        ),
+        None,
+    )
 
-                print(f"Teacher: {instr_name} | Room: {room_num}")
-                print("-" * 30)
-                for i, s in enumerate(sorted(section.students), 1):
-                    print(f"{i}. {s}")
-            else:
-                print("[Error] Class ID not found.")
+    db = open_database(output_dir)
+    if db:
+        with closing(db):
+            school.sections = db.teacher_sections(match) if match else []
+    elif not load_results(school, output_dir, teacher=match):
+        school.teacher_grids = import_teacher_timetables(
+            output_path("teacher_timetables.txt", output_dir)
+        )
+        match = next(
+            (
+                name
+                for name in school.teacher_grids
+                if teacher_lookup(name) == teacher_lookup(t_name_input)
+            ),
+            None,
+        )
 
-        elif choice == "5":
-            school = Scheduler()
-            if not school.load_resources():
-                continue
+    if match:
+        school.print_teacher_timetable(match)
+        return EXIT_OK
+
+    print(f"[Error] No classes found for teacher: {t_name_input}")
+    return EXIT_NOT_FOUND
+
+
+def view_roll(class_id, output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    db = open_database(output_dir)
+    if db:
+        with closing(db):
+            section = db.section(class_id)
+        school.sections = [section] if section else []
+    elif not load_results(school, output_dir, section=class_id):
+        school.sections = rebuild_sections_from_file(
+            output_path("roll_calls.txt", output_dir),
+            school.teachers,
+            school.rooms,
+        )
 
-            print("\n[System] Importing all data...")
+    section = next((s for s in school.sections if s.id == class_id), None)
 
-            school.sections = rebuild_sections_from_file(
-                os.path.join(OUTPUT_DIR, "roll_calls.txt"),
-                school.teachers,
-                school.rooms,
-            )
+    if not section:
+        print("[Error] Class ID not found.")
+        return EXIT_NOT_FOUND
 
-            school.student_schedules = import_student_timetables(
-                os.path.join(OUTPUT_DIR, "student_timetables.txt")
-            )
+    print(f"\nROLL FOR {section.subject} ({section.id})")
 
-            school.teacher_grids = import_teacher_timetables(
-                os.path.join(OUTPUT_DIR, "teacher_timetables.txt")
-            )
+    instr_name = section.instructor.name if section.instructor else "Unknown Teacher"
+    room_num = section.room.number if section.room else "Unknown Room"
 
-            print(
-                f"[Success] Imported {len(school.sections)} sections and {len(school.teacher_grids)} teacher schedules."
-            )
+    print(f"Teacher: {instr_name} | Room: {room_num}")
+    print("-" * 30)
+    for i, s in enumerate(sorted(section.students), 1):
+        print(f"{i}. {s}")
+    return EXIT_OK
 
-        elif choice == "6":
-            school = Scheduler()
-            if not school.load_resources():
-                print("[Error] Could not load rooms/teachers JSON.")
-                continue
-
-            school.sections = rebuild_sections_from_file(
-                os.path.join(OUTPUT_DIR, "roll_calls.txt"),
-                school.teachers,
-                school.rooms,
-            )
 
-            search_system(school)
+def import_all(output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
 
-        elif choice == "7":
-            print("Goodbye!")
-            sys.exit()
+    print("\n[System] Importing all data...")
+
+    db = open_database(output_dir)
+    if db:
+        with closing(db):
+            sections, teachers = db.counts()
+        print(
+            f"[Success] Imported {sections} sections and {teachers} teacher schedules from {DB_NAME}."
+        )
+        return EXIT_OK
+
+    if load_results(school, output_dir, read_only=True):
+        teachers = {t.name for t in school.teachers}
+        teachers.update(sec.instructor.name for sec in school.sections)
+        print(
+            f"[Success] Imported {len(school.sections)} sections and {len(teachers)} teacher schedules from {STORE_NAME}."
+        )
+        return EXIT_OK
+
+    school.sections = rebuild_sections_from_file(
+        output_path("roll_calls.txt", output_dir),
+        school.teachers,
+        school.rooms,
+    )
+
+    school.student_schedules = import_student_timetables(
+        output_path("student_timetables.txt", output_dir)
+    )
+
+    school.teacher_grids = import_teacher_timetables(
+        output_path("teacher_timetables.txt", output_dir)
+    )
+
+    print(
+        f"[Success] Imported {len(school.sections)} sections and {len(school.teacher_grids)} teacher schedules."
+    )
+    return EXIT_OK
+
+
+def verify(output_dir=OUTPUT_DIR):
+    problems = verify_manifest(output_dir)
+    if problems:
+        for problem in problems:
+            print(f"[Error] {problem}")
+        return EXIT_NOT_FOUND
 
+    print(f"[Success] All reports in {output_dir} match {MANIFEST_NAME}.")
+    return EXIT_OK
 
-def search_system(school):
-    print("\n" + "─" * 30)
-    print("      STUDENT CLASS SEARCH      ")
-    print("─" * 30)
 
-    name = input("Enter Student Name (e.g., Student_1): ").strip()
+def render(output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    if not load_results(school, output_dir):
+        if not os.path.exists(output_path(STORE_NAME, output_dir)):
+            print(f"[Error] No {STORE_NAME} found in {output_dir}.")
+        return EXIT_NOT_FOUND
+
+    school.save_all_data(output_dir, os.path.exists(output_path(DB_NAME, output_dir)))
+    return EXIT_OK
+
+
+def serve(host="127.0.0.1", port=8765, socket_path=None, output_dir=OUTPUT_DIR):
+    import asyncio
+    from src.service import TimetableService
+
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    service = TimetableService(output_dir, school.teachers, school.rooms)
+    if not service.load():
+        print(f"[Warning] No {STORE_NAME} in {output_dir} yet; waiting for one.")
+
+    try:
+        asyncio.run(service.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        print("\n[Service] Stopped.")
+    return EXIT_OK
+
+
+def change_pair(value):
+    name, _, subject = value.partition(":")
+    if not name.strip() or not subject.strip():
+        raise argparse.ArgumentTypeError(f"expected NAME:SUBJECT, got '{value}'")
+    return name.strip(), subject.strip()
+
+
+def parse_changes(pairs):
+    changes = {}
+    for name, subject in pairs or []:
+        changes.setdefault(name, []).append(subject)
+    return changes
+
+
+def change(adds, drops, output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    if not load_results(school, output_dir):
+        if not os.path.exists(output_path(STORE_NAME, output_dir)):
+            print(f"[Error] No {STORE_NAME} found in {output_dir}.")
+        return EXIT_NOT_FOUND
+
+    diff = school.apply_changes(adds, drops)
+
+    for name, sec_id in diff["withdrawn"]:
+        print(f"[Change] {name} withdrawn from {sec_id}")
+    for name, sec_id in diff["enrolled"]:
+        print(f"[Change] {name} enrolled in {sec_id}")
+    for sec_id in diff["new_sections"]:
+        print(f"[Change] New section {sec_id}")
+    for name, subject in diff["unplaced"]:
+        print(f"[Warning] Could not place {name} in {subject}")
+
+    school.save_all_data(output_dir, os.path.exists(output_path(DB_NAME, output_dir)))
+    return EXIT_FAILED_REQUESTS if diff["unplaced"] else EXIT_OK
+
+
+def search(name, output_dir=OUTPUT_DIR):
+    school = load_school()
+    if school is None:
+        return EXIT_RESOURCE_ERROR
+
+    db = open_database(output_dir)
+    if db:
+        with closing(db):
+            school.sections = db.student_sections(name)
+    elif not load_results(school, output_dir, student=name):
+        school.sections = rebuild_sections_from_file(
+            output_path("roll_calls.txt", output_dir),
+            school.teachers,
+            school.rooms,
+        )
+
+    return search_system(school, name)
+
+
+def search_system(school, name):
     found_classes = [sec for sec in school.sections if name in sec.students]
 
     if found_classes:
@@ -209,14 +429,14 @@ def search_system(school):
             )
         print("-" * 50)
         print("\nTip: Use Option 4 with these IDs to view the full class roll.")
-    else:
-        print(f"\n[!] No classes found for '{name}'.")
+        return EXIT_OK
 
+    print(f"\n[!] No classes found for '{name}'.")
+    return EXIT_NOT_FOUND
 
-def run(school):
-    ensure_output_dir()
 
-    NUM_STUDENTS = int(input("Enter the number of students: "))
+def generate_student_requests(num_students, seed):
+    rng = random.Random(seed)
 
     topic_weights = {
         "Maths": 5.0,
@@ -248,10 +468,10 @@ def run(school):
     MIN_SUBJECTS = 3
     MAX_SUBJECTS = 5
 
-    for i in range(1, NUM_STUDENTS + 1):
-        target = random.randint(MIN_SUBJECTS, MAX_SUBJECTS)
+    for i in range(1, num_students + 1):
+        target = rng.randint(MIN_SUBJECTS, MAX_SUBJECTS)
 
-        pool = random.choices(topics, weights=weights, k=80)
+        pool = rng.choices(topics, weights=weights, k=80)
         unique = []
         for item in pool:
             if item not in unique:
@@ -261,19 +481,61 @@ def run(school):
 
         if len(unique) < target:
             remaining = [t for t in topics if t not in unique]
-            random.shuffle(remaining)
+            rng.shuffle(remaining)
             unique.extend(remaining[: (target - len(unique))])
 
         student_data[f"Student_{i}"] = unique
 
-    school.solve(student_data)
+    return student_data
+
+
+def print_progress(entry):
+    print(
+        f"[Progress] attempt {entry['attempt']}: failed {entry['failed_count']}, "
+        f"best {entry['best_failed_count']}, {entry['elapsed']:.2f}s"
+    )
+
+
+def run(
+    school,
+    num_students=None,
+    max_attempts=200,
+    workers=1,
+    output_dir=OUTPUT_DIR,
+    profile=None,
+    strategy="backtrack",
+    repair=True,
+    time_budget=None,
+    progress=False,
+    **save_options,
+):
+    ensure_output_dir(output_dir)
+
+    if num_students is None:
+        num_students = int(input("Enter the number of students: "))
+    NUM_STUDENTS = num_students
+
+    student_data = generate_student_requests(NUM_STUDENTS, school.seed)
+
+    school.solve(
+        student_data,
+        max_attempts=max_attempts,
+        workers=workers,
+        profile=profile,
+        strategy=strategy,
+        repair=repair,
+        time_budget=time_budget,
+        on_attempt=print_progress if progress else None,
+    )
 
     if NUM_STUDENTS >= 1:
         school.print_timetable("Student_1")
 
-    school.save_all_data()
+    school.save_all_data(output_dir, **save_options)
 
     if school.failed_requests:
+        from tabulate import tabulate
+
         print("\n" + "!" * 20 + " FAILED REQUESTS SUMMARY " + "!" * 20)
         failure_table = []
         for fail in school.failed_requests:
@@ -295,7 +557,183 @@ def run(school):
         else 0
     )
     print(f"\nFinal Success Rate: {success:.2f}%")
+    print(f"[System] Run seed: {school.seed}")
+
+
+def replay(path=None, output_dir=OUTPUT_DIR):
+    path = path or output_path("roll_calls.txt", output_dir)
+    if path.endswith(".jsonl"):
+        try:
+            info = (read_store(path) or {}).get("run", {})
+        except ValueError as e:
+            print(f"[Error] {e}")
+            return EXIT_NOT_FOUND
+    else:
+        info = read_run_header(path)
+    if "seed" not in info or "students" not in info:
+        print(f"[Error] No run header found in {path}.")
+        return EXIT_NOT_FOUND
+
+    code = generate(
+        num_students=info["students"],
+        seed=info["seed"],
+        max_attempts=info.get("attempts", 200),
+        workers=info.get("workers", 1),
+        output_dir=output_dir,
+        strategy=info.get("strategy", "backtrack"),
+        repair=bool(info.get("repair", 0)),
+        database=os.path.exists(output_path(DB_NAME, output_dir)),
+    )
+    if code != EXIT_RESOURCE_ERROR:
+        print(f"[Success] Replayed run with seed {info['seed']}.")
+    return code
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="ACG school timetable generator. Run without a command for the interactive menu."
+    )
+    parser.add_argument(
+        "--output-dir", default=OUTPUT_DIR, help="directory for generated reports"
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    gen = commands.add_parser("generate", help="generate and save new timetables")
+    gen.add_argument("--students", type=positive_int, required=True)
+    gen.add_argument("--seed", type=int, default=None)
+    gen.add_argument("--attempts", type=positive_int, default=200)
+    gen.add_argument("--workers", type=positive_int, default=1)
+    gen.add_argument("--profile", help="write cProfile stats for the solve here")
+    gen.add_argument(
+        "--strategy",
+        choices=["backtrack", "forward"],
+        default="backtrack",
+        help="student assignment engine; 'forward' uses forward checking",
+    )
+    gen.add_argument(
+        "--no-repair",
+        dest="repair",
+        action="store_false",
+        help="skip the local repair pass for students left unplaced",
+    )
+    gen.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="stop after this many seconds and keep the best attempt so far",
+    )
+    gen.add_argument(
+        "--progress",
+        action="store_true",
+        help="print the attempt number, best failure count and elapsed time",
+    )
+    gen.add_argument(
+        "--sqlite", action="store_true", help=f"also write an indexed {DB_NAME}"
+    )
+    gen.add_argument(
+        "--renderer",
+        choices=["tabulate", "plain"],
+        default="tabulate",
+        help="'plain' uses fixed column widths and skips tabulate",
+    )
+
+    rep = commands.add_parser("replay", help="regenerate a recorded run")
+    rep.add_argument(
+        "file", nargs="?", help=f"{STORE_NAME} or a report with a '# Run:' header"
+    )
+
+    student = commands.add_parser("view-student", help="show a student timetable")
+    student.add_argument("name")
+
+    teacher = commands.add_parser("view-teacher", help="show a teacher timetable")
+    teacher.add_argument("name")
+
+    roll = commands.add_parser("roll", help="show a class roll")
+    roll.add_argument("class_id")
+
+    find = commands.add_parser("search", help="list a student's classes")
+    find.add_argument("name")
+
+    commands.add_parser("import", help="import all existing output files")
+    commands.add_parser("render", help=f"rebuild the text reports from {STORE_NAME}")
+    commands.add_parser("verify", help=f"check the reports against {MANIFEST_NAME}")
+
+    chg = commands.add_parser(
+        "change", help=f"apply enrolment changes to the saved {STORE_NAME}"
+    )
+    chg.add_argument(
+        "--add",
+        action="append",
+        type=change_pair,
+        metavar="NAME:SUBJECT",
+        help="enrol in a subject",
+    )
+    chg.add_argument(
+        "--drop",
+        action="append",
+        type=change_pair,
+        metavar="NAME:SUBJECT",
+        help="drop a subject",
+    )
+
+    srv = commands.add_parser("serve", help="answer lookups over local HTTP/JSON")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--socket", help="listen on this unix socket instead")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = args.output_dir
+
+    if args.command is None:
+        options()
+    elif args.command == "generate":
+        return generate(
+            args.students,
+            args.seed,
+            args.attempts,
+            args.workers,
+            out,
+            args.profile,
+            args.strategy,
+            args.repair,
+            args.time_budget,
+            args.progress,
+            database=args.sqlite,
+            renderer=args.renderer,
+        )
+    elif args.command == "replay":
+        return replay(args.file, out)
+    elif args.command == "view-student":
+        return view_student(args.name, out)
+    elif args.command == "view-teacher":
+        return view_teacher(args.name, out)
+    elif args.command == "roll":
+        return view_roll(args.class_id, out)
+    elif args.command == "search":
+        return search(args.name, out)
+    elif args.command == "import":
+        return import_all(out)
+    elif args.command == "render":
+        return render(out)
+    elif args.command == "verify":
+        return verify(out)
+    elif args.command == "change":
+        return change(parse_changes(args.add), parse_changes(args.drop), out)
+    elif args.command == "serve":
+        return serve(args.host, args.port, args.socket, out)
+    return EXIT_OK
 
 
 if __name__ == "__main__":
-    options()
+    sys.exit(main())
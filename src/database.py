@@ -0,0 +1,171 @@
+import os
+import sqlite3
+from .models import Room, Instructor, Section
+
+DB_NAME = "timetable.db"
+
+SCHEMA = """
+CREATE TABLE run (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE teachers (name TEXT PRIMARY KEY, lookup TEXT NOT NULL);
+CREATE TABLE rooms (number TEXT PRIMARY KEY, type TEXT, capacity INTEGER);
+CREATE TABLE sections (
+    id TEXT PRIMARY KEY,
+    subject TEXT NOT NULL,
+    teacher TEXT NOT NULL,
+    room TEXT NOT NULL
+);
+CREATE TABLE slots (section_id TEXT NOT NULL, day TEXT NOT NULL, period INTEGER NOT NULL);
+CREATE TABLE enrolments (section_id TEXT NOT NULL, student TEXT NOT NULL);
+CREATE TABLE failed (student TEXT PRIMARY KEY, failed_at TEXT, requested TEXT);
+
+CREATE INDEX idx_teachers_lookup ON teachers (lookup);
+CREATE INDEX idx_sections_teacher ON sections (teacher);
+CREATE INDEX idx_slots_section ON slots (section_id);
+CREATE INDEX idx_slots_time ON slots (day, period);
+CREATE INDEX idx_enrolments_section ON enrolments (section_id);
+CREATE INDEX idx_enrolments_student ON enrolments (student);
+CREATE INDEX idx_enrolments_student_nocase ON enrolments (student COLLATE NOCASE);
+"""
+
+
+def teacher_lookup(name):
+    return name.lower().replace(".", "")
+
+
+def write_database(path, run_info, sections, failed_requests, teachers, rooms):
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO run VALUES (?, ?)",
+            [(k, str(v)) for k, v in run_info.items()],
+        )
+
+        teacher_names = {t.name for t in teachers}
+        teacher_names.update(sec.instructor.name for sec in sections)
+        conn.executemany(
+            "INSERT INTO teachers VALUES (?, ?)",
+            [(name, teacher_lookup(name)) for name in sorted(teacher_names)],
+        )
+
+        room_rows = {r.number: (r.number, r.type, r.capacity) for r in rooms}
+        for sec in sections:
+            room_rows.setdefault(
+                sec.room.number, (sec.room.number, sec.room.type, sec.room.capacity)
+            )
+        conn.executemany("INSERT INTO rooms VALUES (?, ?, ?)", room_rows.values())
+
+        conn.executemany(
+            "INSERT INTO sections VALUES (?, ?, ?, ?)",
+            [
+                (sec.id, sec.subject, sec.instructor.name, sec.room.number)
+                for sec in sections
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO slots VALUES (?, ?, ?)",
+            [(sec.id, d, p) for sec in sections for d, p in sec.slots],
+        )
+        conn.executemany(
+            "INSERT INTO enrolments VALUES (?, ?)",
+            [(sec.id, name) for sec in sections for name in sec.students],
+        )
+        conn.executemany(
+            "INSERT INTO failed VALUES (?, ?, ?)",
+            [
+                (fr["name"], fr["failed_at"], ", ".join(fr["all_requested"]))
+                for fr in failed_requests
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+
+class TimetableDB:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def close(self):
+        self.conn.close()
+
+    def run_info(self):
+        return dict(self.conn.execute("SELECT key, value FROM run"))
+
+    def _sections(self, where, params, with_students=True):
+        rows = self.conn.execute(
+            "SELECT s.id, s.subject, s.teacher, r.number, r.type, r.capacity "
+            "FROM sections s JOIN rooms r ON r.number = s.room "
+            f"WHERE {where} ORDER BY s.rowid",
+            params,
+        ).fetchall()
+
+        sections = []
+        for sec_id, subject, t_name, r_num, r_type, capacity in rows:
+            sec = Section(
+                sec_id,
+                subject,
+                Instructor(t_name, [subject]),
+                Room(r_num, r_type, capacity),
+            )
+            sec.slots = [
+                (d, p)
+                for d, p in self.conn.execute(
+                    "SELECT day, period FROM slots WHERE section_id = ?", (sec_id,)
+                )
+            ]
+            if with_students:
+                sec.students = [
+                    name
+                    for (name,) in self.conn.execute(
+                        "SELECT student FROM enrolments WHERE section_id = ? "
+                        "ORDER BY student",
+                        (sec_id,),
+                    )
+                ]
+            sections.append(sec)
+        return sections
+
+    def find_student(self, name):
+        row = self.conn.execute(
+            "SELECT student FROM enrolments WHERE student = ? COLLATE NOCASE LIMIT 1",
+            (name,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def student_sections(self, name):
+        return self._sections(
+            "s.id IN (SELECT section_id FROM enrolments WHERE student = ?)", (name,)
+        )
+
+    def counts(self):
+        sections = self.conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+        teachers = self.conn.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+        return sections, teachers
+
+    def find_teacher(self, name):
+        row = self.conn.execute(
+            "SELECT name FROM teachers WHERE lookup = ?", (teacher_lookup(name),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def teacher_sections(self, name):
+        return self._sections("s.teacher = ?", (name,))
+
+    def section(self, class_id):
+        sections = self._sections("s.id = ?", (class_id,))
+        return sections[0] if sections else None
+
+    def sections_at(self, day, period):
+        return self._sections(
+            "s.id IN (SELECT section_id FROM slots WHERE day = ? AND period = ?)",
+            (day, period),
+            with_students=False,
+        )
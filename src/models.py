@@ -1,4 +1,30 @@
+import sys
+from array import array
+
+
+class StudentRegistry:
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def id_for(self, name):
+        sid = self.ids.get(name)
+        if sid is None:
+            name = sys.intern(name)
+            sid = len(self.names)
+            self.ids[name] = sid
+            self.names.append(name)
+        return sid
+
+
+STUDENTS = StudentRegistry()
+
+
 class Room:
+    __slots__ = ("number", "type", "capacity", "preferred_subjects")
+
     def __init__(self, number, r_type, capacity, preferred_subjects=None):
         self.number = number
         self.type = r_type
@@ -10,6 +36,8 @@ class Room:
 
 
 class Instructor:
+    __slots__ = ("name", "subjects")
+
     def __init__(self, name, subjects):
         self.name = name
         self.subjects = subjects
@@ -19,13 +47,40 @@ class Instructor:
 
 
 class Section:
+    __slots__ = ("id", "subject", "instructor", "room", "slots", "mask", "student_ids")
+
     def __init__(self, id, subject, instructor, room):
         self.id = id
         self.subject = subject
         self.instructor = instructor
         self.room = room
         self.slots = []
-        self.students = []
+        self.mask = 0
+        self.student_ids = array("I")
+
+    @property
+    def students(self):
+        names = STUDENTS.names
+        return [names[sid] for sid in self.student_ids]
+
+    @students.setter
+    def students(self, names):
+        self.student_ids = array("I", [STUDENTS.id_for(name) for name in names])
+
+    def add_student(self, sid):
+        self.student_ids.append(sid)
+
+    def remove_student(self, sid):
+        # O(1) only for last-in-first-out undo, as in _backtrack and
+        # _forward_check. Repair and apply_changes remove from arbitrary
+        # positions and pay a scan of the roll, bounded by room capacity.
+        # Swapping with the last id would make that O(1) too, but it would
+        # reorder the roll, and the store and reports keep insertion order.
+        ids = self.student_ids
+        if ids and ids[-1] == sid:
+            ids.pop()
+        else:
+            ids.remove(sid)
 
     def __str__(self):
         return f"[{self.subject}, {self.room}, {self.instructor}]"
@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+
+def validate_resources(room_data, teacher_data):
+    problems = []
+
+    if not isinstance(room_data, dict) or not isinstance(teacher_data, dict):
+        return ["rooms.json and teachers.json must each hold a JSON object"]
+
+    for number, data in room_data.items():
+        if not isinstance(data, dict):
+            problems.append(f"room {number}: entry must be an object")
+            continue
+        if not isinstance(data.get("type"), str):
+            problems.append(f"room {number}: missing 'type'")
+        capacity = data.get("capacity")
+        if not isinstance(capacity, int) or capacity <= 0:
+            problems.append(f"room {number}: capacity must be a positive integer")
+        preferred = data.get("preferred_subjects", [])
+        if not isinstance(preferred, list) or not all(
+            isinstance(s, str) for s in preferred
+        ):
+            problems.append(f"room {number}: preferred_subjects must be a list")
+
+    for name, subjects in teacher_data.items():
+        if not isinstance(subjects, list) or not all(
+            isinstance(s, str) for s in subjects
+        ):
+            problems.append(f"teacher {name}: subjects must be a list of names")
+
+    return problems
+
+
+class ResourceIndex:
+    def __init__(self, teachers, rooms, subject_requirements):
+        self.teachers_by_name = {t.name: t for t in teachers}
+        self.rooms_by_number = {r.number: r for r in rooms}
+
+        self.teachers_by_subject = defaultdict(list)
+        for t in teachers:
+            for sub in dict.fromkeys(t.subjects):
+                self.teachers_by_subject[sub].append(t)
+
+        self.preferred_rooms = defaultdict(list)
+        self.rooms_by_type = defaultdict(list)
+        for r in rooms:
+            self.rooms_by_type[r.type].append(r)
+            for sub in dict.fromkeys(r.preferred_subjects):
+                self.preferred_rooms[sub].append(r)
+
+        self.room_pools = {}
+        for sub in set(subject_requirements) | set(self.teachers_by_subject):
+            self.room_pools[sub] = self.preferred_rooms.get(
+                sub
+            ) or self.rooms_by_type.get(subject_requirements.get(sub, "General"), [])
+
+        self.teachers_by_subject = dict(self.teachers_by_subject)
+        self.preferred_rooms = dict(self.preferred_rooms)
+        self.rooms_by_type = dict(self.rooms_by_type)
+
+    def teachers_for(self, subject):
+        return self.teachers_by_subject.get(subject, [])
+
+    def rooms_for(self, subject):
+        return self.room_pools.get(subject, [])
@@ -2,9 +2,34 @@ import random
 import os
 import math
 import json
-import copy
-from tabulate import tabulate
-from .models import Room, Instructor, Section
+import itertools
+import hashlib
+import time
+from collections import defaultdict
+from array import array
+from contextlib import contextmanager
+from operator import add
+from .models import STUDENTS, Room, Instructor, Section
+from .resources import ResourceIndex, validate_resources
+from .store import (
+    STORE_NAME,
+    index_store,
+    read_store,
+    read_store_records,
+    store_blocks,
+)
+from .database import DB_NAME, write_database
+from .utils import (
+    MANIFEST_NAME,
+    atomic_write,
+    box_grid,
+    plain_grid,
+    write_manifest,
+)
+
+RESOURCE_FILES = ("rooms.json", "teachers.json")
+RESOURCE_CACHE = ".resource_cache.json"
+CACHE_VERSION = 2
 
 
 class MasterSystem:
@@ -39,262 +64,744 @@ class MasterSystem:
         self.sections = []
         self.student_schedules = {}
         self.failed_requests = []
+        self.resources = None
+
+    def _resource_key(self):
+        key = [CACHE_VERSION]
+        for name in RESOURCE_FILES:
+            with open(name, "rb") as f:
+                key.append([name, hashlib.sha256(f.read()).hexdigest()])
+        key.append(sorted(self.subject_requirements.items()))
+        # Round-trip through JSON so the key compares equal to the cached one.
+        return json.loads(json.dumps(key))
+
+    def _read_resource_cache(self, key):
+        try:
+            with open(RESOURCE_CACHE, "r") as f:
+                cached = json.load(f)
+            if cached.get("key") != key:
+                return False
+            rooms = [
+                Room(number, r_type, capacity, preferred)
+                for number, r_type, capacity, preferred in cached["rooms"]
+            ]
+            teachers = [
+                Instructor(name, subjects) for name, subjects in cached["teachers"]
+            ]
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            return False
+        self.rooms = rooms
+        self.teachers = teachers
+        self.resources = None
+        return True
+
+    def _write_resource_cache(self, key):
+        tmp_path = RESOURCE_CACHE + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {
+                        "key": key,
+                        "rooms": [
+                            [r.number, r.type, r.capacity, r.preferred_subjects]
+                            for r in self.rooms
+                        ],
+                        "teachers": [[t.name, t.subjects] for t in self.teachers],
+                    },
+                    f,
+                )
+            os.replace(tmp_path, RESOURCE_CACHE)
+        except OSError:
+            pass
+
+    def resource_index(self):
+        if self.resources is None:
+            self.resources = ResourceIndex(
+                self.teachers, self.rooms, self.subject_requirements
+            )
+        return self.resources
 
     def load_resources(self):
         if os.path.exists("rooms.json") and os.path.exists("teachers.json"):
-            try:
-                with open("rooms.json", "r") as f:
-                    room_data = json.load(f)
-
-                    self.rooms = [
-                        Room(
-                            room_number,
-                            data["type"],
-                            data["capacity"],
-                            data.get("preferred_subjects", []),
-                        )
-                        for room_number, data in room_data.items()
-                    ]
-
-                with open("teachers.json", "r") as f:
-                    teacher_data = json.load(f)
-                    self.teachers = [Instructor(k, v) for k, v in teacher_data.items()]
+            key = self._resource_key()
+            cached = self._read_resource_cache(key)
+            if not cached:
+                try:
+                    with open("rooms.json", "r") as f:
+                        room_data = json.load(f)
+                    with open("teachers.json", "r") as f:
+                        teacher_data = json.load(f)
+                except Exception as e:
+                    print(f"[Error] Failed to parse JSON: {e}")
+                    return False
 
-                if not self.rooms or not self.teachers:
-                    print("[Error] Resource files loaded but contain no data.")
+                problems = validate_resources(room_data, teacher_data)
+                if problems:
+                    for problem in problems:
+                        print(f"[Error] {problem}")
                     return False
 
-                print(
-                    f"[System] Resources loaded: {len(self.rooms)} rooms, {len(self.teachers)} teachers."
-                )
-                return True
-            except Exception as e:
-                print(f"[Error] Failed to parse JSON: {e}")
+                self.rooms = [
+                    Room(
+                        room_number,
+                        data["type"],
+                        data["capacity"],
+                        data.get("preferred_subjects", []),
+                    )
+                    for room_number, data in room_data.items()
+                ]
+                self.teachers = [Instructor(k, v) for k, v in teacher_data.items()]
+                self.resources = None
+
+            if not self.rooms or not self.teachers:
+                print("[Error] Resource files loaded but contain no data.")
                 return False
+
+            print(
+                f"[System] Resources loaded: {len(self.rooms)} rooms, {len(self.teachers)} teachers."
+            )
+            if not cached:
+                self._write_resource_cache(key)
+            return True
         else:
             print("[Error] rooms.json or teachers.json not found in directory.")
             return False
 
 
 class Scheduler(MasterSystem):
-    def __init__(self):
+    PATTERN_SAMPLE_SIZE = 500
+    WRITE_BUFFER = 1 << 20
+    WRITE_CHUNK = 256
+    COUNTERS = [
+        "patterns_scored",
+        "backtrack_nodes",
+        "backtracks_undone",
+        "capacity_rejections",
+        "mon_p6_rejections",
+        "forward_prunes",
+        "repaired_students",
+        "ejections",
+        "pattern_swaps",
+        "repair_sections",
+        "timed_out_students",
+    ]
+    REPAIR_SECTION_LIMIT = 25
+    REPAIR_EJECTION_LIMIT = 2000
+    SECTION_FILL = 0.45
+    SECTION_VARIETY = 3.5
+    MIN_SECTION_SIZE = 4
+    ASSIGNMENT_STRATEGIES = {
+        "backtrack": "_assign_students",
+        "forward": "_assign_forward",
+    }
+
+    _pattern_catalogues = {}
+
+    def __init__(self, seed=None):
         super().__init__()
-        self.patterns = self._generate_all_patterns()
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.run_info = {"seed": self.seed}
+        self.metrics = {}
+        self.on_attempt = None
+        self.strategy = "backtrack"
+        self._stop_at = None
+        self.repair = True
+        self._reset_counters()
+        self._catalogue = None
+
+        self.slot_bits = {}
+        for d in self.days:
+            for p in range(self.period_counts[d]):
+                self.slot_bits[(d, p)] = 1 << len(self.slot_bits)
+        self.reserved_mask = self._slot_mask([("Tue", 1), ("Fri", 5)])
+        self.other_last_mask = self._slot_mask(
+            (d, self.period_counts[d] - 1) for d in self.days if d not in ("Mon", "Fri")
+        )
 
-    def _generate_all_patterns(self):
-        patterns = []
-        for _ in range(500):
-            extended_p = []
-            for d in self.days:
-                if d == "Fri":
-                    continue
-                last_p = self.period_counts[d] - 1
-                extended_p.append((d, last_p))
-            patterns.append(extended_p)
+        self.student_names = []
+        self.student_masks = {}
+        self.student_sections = {}
+        self.subject_sections = {}
+        self.remaining_capacity = {}
 
-            standard_p = []
-            for d in self.days:
-                last_p = self.period_counts[d] - 1
-                possible = [i for i in range(last_p) if not (d == "Tue" and i == 1)]
-                standard_p.append((d, random.choice(possible)))
-            patterns.append(standard_p)
+    @property
+    def patterns(self):
+        if self._catalogue is None:
+            self._catalogue = self._generate_all_patterns()
+        return self._catalogue[0]
 
-        return patterns
+    @property
+    def patterns_by_slot(self):
+        if self._catalogue is None:
+            self._catalogue = self._generate_all_patterns()
+        return self._catalogue[1]
 
-    def solve(self, student_requests, max_attempts=200):
-        print("\n" + "=" * 60 + "\n TIMETABLE GENERATOR STARTING\n" + "=" * 60)
+    def _generate_all_patterns(self):
+        key = tuple((d, self.period_counts[d]) for d in self.days)
+        if key in Scheduler._pattern_catalogues:
+            return Scheduler._pattern_catalogues[key]
 
-        self.student_schedules = {}
-        self.failed_requests = []
-        self.sections = []
+        extended_p = tuple(
+            (d, self.period_counts[d] - 1) for d in self.days if d != "Fri"
+        )
 
-        counts = {}
-        for subs in student_requests.values():
-            for s in subs:
-                counts[s] = counts.get(s, 0) + 1
+        day_choices = []
+        for d in self.days:
+            last_p = self.period_counts[d] - 1
+            day_choices.append(
+                [(d, i) for i in range(last_p) if not (d == "Tue" and i == 1)]
+            )
+
+        patterns = [extended_p] + list(itertools.product(*day_choices))
 
-        total_students = len(student_requests)
+        patterns_by_slot = defaultdict(list)
+        for p_id, p in enumerate(patterns):
+            for slot in p:
+                patterns_by_slot[slot].append(p_id)
 
-        divisor = 8 if total_students <= 120 else 12
+        Scheduler._pattern_catalogues[key] = (patterns, dict(patterns_by_slot))
+        return Scheduler._pattern_catalogues[key]
 
-        section_plan = {
-            sub: max(2, math.ceil(count / divisor)) for sub, count in counts.items()
+    def _sample_patterns(self):
+        extended_ids = set(self.patterns_by_slot.get(("Mon", 5), []))
+        standard_ids = [
+            p_id for p_id in range(len(self.patterns)) if p_id not in extended_ids
+        ]
+        k = min(self.PATTERN_SAMPLE_SIZE, len(standard_ids))
+        return sorted(extended_ids) + self.rng.sample(standard_ids, k)
+
+    def _slot_mask(self, slots):
+        mask = 0
+        for slot in slots:
+            mask |= self.slot_bits[slot]
+        return mask
+
+    def _reset_counters(self):
+        self.counters = {counter: 0 for counter in self.COUNTERS}
+
+    @contextmanager
+    def _timed(self, phases, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases[phase] = phases.get(phase, 0) + time.perf_counter() - start
+
+    def solve(
+        self,
+        student_requests,
+        max_attempts=200,
+        workers=1,
+        on_attempt=None,
+        profile=None,
+        strategy="backtrack",
+        repair=True,
+        time_budget=None,
+        deadline=None,
+    ):
+        if strategy not in self.ASSIGNMENT_STRATEGIES:
+            raise ValueError(f"Unknown assignment strategy: {strategy}")
+        self.strategy = strategy
+        self.repair = repair
+        self.metrics = {
+            "phases": {},
+            "counters": {counter: 0 for counter in self.COUNTERS},
+            "attempts": [],
+            "best_failed_count": None,
         }
+        self.on_attempt = on_attempt
+
+        self._started = time.perf_counter()
+        self._stop_at = None
+        if time_budget is not None:
+            self._stop_at = self._started + time_budget
+        if deadline is not None:
+            stop_at = self._started + (deadline - time.time())
+            self._stop_at = min(self._stop_at or stop_at, stop_at)
+
+        profiler = None
+        if profile:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            with self._timed(self.metrics["phases"], "total"):
+                self._solve(student_requests, max_attempts, workers)
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(profile)
+                self.metrics["profile"] = profile
+
+        phases = self.metrics["phases"]
+        print(
+            "[System] Solve time: "
+            + ", ".join(f"{phase} {secs:.2f}s" for phase, secs in phases.items())
+        )
 
-        best = None
+    def _record_attempt(self, attempt, result):
+        best = self.metrics["best_failed_count"]
+        if best is None or result["failed_count"] < best:
+            best = self.metrics["best_failed_count"] = result["failed_count"]
 
-        for attempt in range(1, max_attempts + 1):
-            self.patterns = self._generate_all_patterns()
+        entry = {
+            "attempt": attempt,
+            "failed_count": result["failed_count"],
+            "best_failed_count": best,
+            "elapsed": time.perf_counter() - self._started,
+        }
+        entry.update(result["metrics"])
+        self.metrics["attempts"].append(entry)
 
-            self.sections = []
-            teacher_load = {}
+        for phase, secs in entry["phases"].items():
+            self.metrics["phases"][phase] = self.metrics["phases"].get(phase, 0) + secs
+        for counter, value in entry["counters"].items():
+            self.metrics["counters"][counter] += value
 
-            for sub, count in counts.items():
-                possible_teachers = [t for t in self.teachers if sub in t.subjects]
-                if not possible_teachers:
-                    continue
+        if self.on_attempt:
+            self.on_attempt(entry)
 
-                preferred_rooms = [r for r in self.rooms if sub in r.preferred_subjects]
-                if preferred_rooms:
-                    selected_rooms_pool = preferred_rooms
-                else:
-                    req_type = self.subject_requirements.get(sub, "General")
-                    selected_rooms_pool = [r for r in self.rooms if r.type == req_type]
+    def _solve(self, student_requests, max_attempts, workers):
+        print("\n" + "=" * 60 + "\n TIMETABLE GENERATOR STARTING\n" + "=" * 60)
 
-                if not selected_rooms_pool:
-                    continue
+        self.student_schedules = {}
+        self.failed_requests = []
+        self.sections = []
+        self.student_names = sorted(student_requests.keys())
+        self.run_info = {
+            "seed": self.seed,
+            "students": len(student_requests),
+            "attempts": max_attempts,
+            "workers": workers,
+            "strategy": self.strategy,
+            "repair": int(self.repair),
+        }
 
-                num_sections = section_plan.get(sub, 2)
+        with self._timed(self.metrics["phases"], "planning"):
+            counts, section_plan = self._plan_sections(student_requests)
 
-                for i in range(1, num_sections + 1):
-                    possible_teachers_sorted = sorted(
-                        possible_teachers,
-                        key=lambda t: teacher_load.get((t.name, sub), 0),
-                    )
-                    selected_teacher = possible_teachers_sorted[0]
-                    teacher_load[(selected_teacher.name, sub)] = (
-                        teacher_load.get((selected_teacher.name, sub), 0) + 1
-                    )
+        best = None
+        best_attempt = None
+        base_seed = self.rng.randrange(2**32)
+
+        pool = None
+        if workers > 1:
+            from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_attempt_worker,
+                initargs=(
+                    self.rooms,
+                    self.teachers,
+                    student_requests,
+                    self.strategy,
+                    self.repair,
+                    self._deadline(),
+                ),
+            )
 
-                    selected_room = random.choice(selected_rooms_pool)
+        try:
+            attempt = 0
+            while attempt < max_attempts:
+                if pool:
+                    batch = min(workers, max_attempts - attempt)
+                    futures = {
+                        pool.submit(
+                            _run_attempt_worker,
+                            (section_plan, base_seed + attempt + i),
+                        ): i
+                        for i in range(batch)
+                    }
+                    # Once an attempt solves, later attempts in the batch are
+                    # cancelled but earlier ones are still awaited, so the
+                    # winner never depends on which worker finished first.
+                    finished = {}
+                    solved = None
+                    pending = set(futures)
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            if future.cancelled():
+                                continue
+                            i = futures[future]
+                            result = finished[i] = future.result()
+                            if (
+                                result is not None
+                                and result["failed_count"] == 0
+                                and (solved is None or i < solved)
+                            ):
+                                solved = i
+                        if solved is not None:
+                            for future in pending:
+                                if futures[future] > solved:
+                                    future.cancel()
+                            pending = {f for f in pending if futures[f] < solved}
+                    kept = sorted(i for i in finished if solved is None or i <= solved)
+                    results = [finished[i] for i in kept]
+                    numbers = [attempt + i + 1 for i in kept]
+                else:
+                    batch = 1
+                    results = [
+                        self._run_attempt(student_requests, counts, section_plan)
+                    ]
+                    numbers = [attempt + 1]
 
-                    sub_parts = sub.split()
-                    prefix = (
-                        (sub_parts[0][:3] + sub_parts[1][:2])
-                        if len(sub_parts) > 1
-                        else sub[:5]
-                    )
-                    section_id = f"{prefix}-{i}"
+                if any(r is None for r in results):
+                    print("[Error] No sections created. Termination.")
+                    return
 
-                    self.sections.append(
-                        Section(section_id, sub, selected_teacher, selected_room)
-                    )
+                for number, result in zip(numbers, results):
+                    self._record_attempt(number, result)
+                    if best is None or result["failed_count"] < best["failed_count"]:
+                        best = result
+                        best_attempt = number
 
-            if not self.sections:
-                print("[Error] No sections created. Termination.")
-                return
+                attempt += batch
 
-            slot_usage = {}
-            teacher_usage = {}
-            room_usage = {}
-            pattern_usage = {}
+                if best["failed_count"] == 0:
+                    if best_attempt > 1:
+                        print(
+                            f"[System] Solved with 100% success on attempt {best_attempt}/{max_attempts}."
+                        )
+                    with self._timed(self.metrics["phases"], "restore"):
+                        self._restore(best)
+                    return
 
-            from collections import defaultdict
+                if self._out_of_time():
+                    self.run_info["attempts"] = attempt
+                    self.metrics["stopped"] = "time_budget"
+                    print(
+                        f"[Warning] Time budget reached after {attempt} attempts. "
+                        f"Keeping the best attempt ({best['failed_count']} failures)."
+                    )
+                    break
 
-            sub_to_sections = defaultdict(list)
-            for sec in self.sections:
-                sub_to_sections[sec.subject].append(sec)
+                failed_subjects = [
+                    failed_at
+                    for result in results
+                    for _, failed_at, _ in result["failed"]
+                ]
+                self._grow_section_plan(failed_subjects, counts, section_plan)
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
 
-            for subject, sections in sub_to_sections.items():
-                for sec in sections:
-                    best_pattern = None
-                    min_cost = float("inf")
+        if best:
+            with self._timed(self.metrics["phases"], "restore"):
+                self._restore(best)
+            if self.metrics.get("stopped"):
+                return
+            print(
+                f"[Warning] Could not reach 100% after {max_attempts} attempts. "
+                f"Best attempt still has {best['failed_count']} failures."
+            )
 
-                    random.shuffle(self.patterns)
-                    for p in self.patterns:
-                        cost = 0
-                        p_key = tuple(p)
-                        reuse = pattern_usage.get(p_key, 0)
+    def _plan_sections(self, student_requests):
+        counts = {}
+        co_requests = defaultdict(int)
+        for subs in student_requests.values():
+            for s in subs:
+                counts[s] = counts.get(s, 0) + 1
+            for a, b in itertools.permutations(subs, 2):
+                co_requests[a, b] += 1
+
+        # Subject load of the students taking each subject, from its
+        # co-requested pairs: 1 + sum(n_ab) / n_a.
+        bundle = {sub: 1.0 for sub in counts}
+        for (a, _b), n in co_requests.items():
+            bundle[a] += n / counts[a]
+
+        resources = self.resource_index()
+        budget = self._teacher_budget()
+        section_plan = {}
+        wanted = {}
+        for sub in self._by_staffing(counts):
+            count = counts[sub]
+            rooms = resources.rooms_for(sub)
+            teachers = resources.teachers_for(sub)
+            if not rooms or not teachers:
+                section_plan[sub] = 2
+                continue
+
+            # Every student needs a seat, and sections need spare seats for
+            # choice, even past what the subject's teachers can teach...
+            capacity = sum(r.capacity for r in rooms) / len(rooms)
+            seats = math.ceil(count / (capacity * self.SECTION_FILL))
+            section_plan[sub] = seats
+            for _ in range(seats):
+                self._take_teacher(teachers, budget)
+
+            # ...and beyond that, enough distinct patterns for students with
+            # many subjects, without sections so small that they only exist
+            # to spread the timetable out.
+            by_variety = min(
+                math.ceil(self.SECTION_VARIETY * bundle[sub]),
+                count // self.MIN_SECTION_SIZE,
+            )
+            wanted[sub] = max(seats, by_variety)
+
+        # Hand out the remaining teaching periods to the subjects furthest
+        # short of what they want, while a qualified teacher is free.
+        while True:
+            open_subjects = [
+                sub
+                for sub in wanted
+                if section_plan[sub] < wanted[sub]
+                and any(budget[t.name] > 0 for t in resources.teachers_for(sub))
+            ]
+            if not open_subjects:
+                break
+            sub = min(open_subjects, key=lambda s: section_plan[s] / wanted[s])
+            section_plan[sub] += 1
+            self._take_teacher(resources.teachers_for(sub), budget)
+        return counts, section_plan
+
+    def _teacher_budget(self):
+        # A standard pattern meets once a day, so a teacher can take this many
+        # sections before two of them must share a period.
+        per_teacher = len(self.patterns_by_slot) // len(self.days)
+        return {t.name: per_teacher for t in self.teachers}
+
+    def _by_staffing(self, subjects):
+        resources = self.resource_index()
+        return sorted(subjects, key=lambda sub: len(resources.teachers_for(sub)))
+
+    def _take_teacher(self, teachers, budget):
+        # Spend teachers who cover fewer subjects first, keeping shared staff
+        # for the subjects that have no one else. Once all of them are spent,
+        # overbook whoever is overbooked least.
+        def preference(t):
+            left = budget[t.name]
+            if left > 0:
+                return (1, -len(t.subjects), left)
+            return (0, left, -len(t.subjects))
+
+        teacher = max(teachers, key=preference)
+        budget[teacher.name] -= 1
+        return teacher
+
+    def _out_of_time(self):
+        return self._stop_at is not None and time.perf_counter() >= self._stop_at
+
+    def _deadline(self):
+        if self._stop_at is None:
+            return None
+        return time.time() + (self._stop_at - time.perf_counter())
+
+    def _run_attempt(self, student_requests, counts, section_plan):
+        self._reset_counters()
+        phases = {}
+
+        with self._timed(phases, "sections"):
+            candidates = self._sample_patterns()
+            self._build_sections(counts, section_plan)
+        if not self.sections:
+            return None
+
+        with self._timed(phases, "placement"):
+            self._place_sections(candidates)
+        assign = getattr(self, self.ASSIGNMENT_STRATEGIES[self.strategy])
+        with self._timed(phases, "assignment"):
+            assign(student_requests)
+        if self.repair and self.failed_requests and not self._out_of_time():
+            with self._timed(phases, "repair"):
+                self._repair()
+        with self._timed(phases, "snapshot"):
+            snapshot = self._snapshot()
+
+        snapshot["metrics"] = {"phases": phases, "counters": dict(self.counters)}
+        return snapshot
+
+    def _snapshot(self):
+        index = {STUDENTS.id_for(name): i for i, name in enumerate(self.student_names)}
+
+        sections = [
+            (
+                sec.id,
+                sec.subject,
+                sec.instructor.name,
+                sec.room.number,
+                tuple(sec.slots),
+                array("I", [index[sid] for sid in sec.student_ids]),
+            )
+            for sec in self.sections
+        ]
+        failed = [
+            (
+                index[STUDENTS.id_for(fr["name"])],
+                fr["failed_at"],
+                tuple(fr["all_requested"]),
+            )
+            for fr in self.failed_requests
+        ]
 
-                        is_extended = any(d == "Mon" and s == 5 for d, s in p)
+        return {"failed_count": len(failed), "sections": sections, "failed": failed}
 
-                        for slot in p:
-                            cost += slot_usage.get(slot, 0) * 1000
+    def _restore(self, snapshot):
+        teachers = {t.name: t for t in self.teachers}
+        rooms = {r.number: r for r in self.rooms}
+        names = self.student_names
+        ids = [STUDENTS.id_for(name) for name in names]
 
-                            if (sec.instructor.name, slot) in teacher_usage:
-                                cost += 100000
-                            if (sec.room.number, slot) in room_usage:
-                                cost += 100000
+        self.sections = []
+        self.student_masks = {name: self.reserved_mask for name in names}
+        self.student_sections = {name: [] for name in names}
+
+        for sec_id, subject, t_name, r_num, slots, student_ids in snapshot["sections"]:
+            sec = Section(sec_id, subject, teachers[t_name], rooms[r_num])
+            sec.slots = list(slots)
+            sec.mask = self._slot_mask(slots)
+            sec.student_ids = array("I", [ids[i] for i in student_ids])
+            for i in student_ids:
+                self.student_sections[names[i]].append(sec)
+                self.student_masks[names[i]] |= sec.mask
+            self.sections.append(sec)
 
-                        cost += reuse * 2500
-                        if len(sections) == 1:
-                            cost += reuse * 9000
+        self.failed_requests = []
+        for i, failed_at, requested in snapshot["failed"]:
+            self.student_sections[names[i]] = None
+            self.failed_requests.append(
+                {
+                    "name": names[i],
+                    "failed_at": failed_at,
+                    "all_requested": list(requested),
+                }
+            )
 
-                        if len(sections) == 1 and is_extended:
-                            cost += 5000
+        self._build_student_schedules()
+
+    def _grow_section_plan(self, failed_subjects, counts, section_plan):
+        # Every subject that failed a student gets one more section. It is
+        # taught from spare budget where there is any; otherwise
+        # _take_teacher and _place_sections spread the overbooking across
+        # teachers and periods.
+        for sub in dict.fromkeys(failed_subjects):
+            if sub in counts:
+                current = section_plan.get(sub, 2)
+                cap = max(6, math.ceil(counts[sub] / 3) + 6)
+                if current < cap:
+                    section_plan[sub] = current + 1
+
+    def _build_sections(self, counts, section_plan):
+        self.sections = []
+        budget = self._teacher_budget()
+        resources = self.resource_index()
 
-                        if cost < min_cost:
-                            min_cost = cost
-                            best_pattern = p
+        for sub in self._by_staffing(counts):
+            possible_teachers = resources.teachers_for(sub)
+            if not possible_teachers:
+                continue
 
-                    sec.slots = best_pattern
+            selected_rooms_pool = resources.rooms_for(sub)
+            if not selected_rooms_pool:
+                continue
 
-                    for slot in best_pattern:
-                        slot_usage[slot] = slot_usage.get(slot, 0) + 1
-                        teacher_usage[(sec.instructor.name, slot)] = True
-                        room_usage[(sec.room.number, slot)] = True
+            num_sections = section_plan.get(sub, 2)
 
-                    b_key = tuple(best_pattern)
-                    pattern_usage[b_key] = pattern_usage.get(b_key, 0) + 1
+            for i in range(1, num_sections + 1):
+                selected_teacher = self._take_teacher(possible_teachers, budget)
 
-            self._assign_students(student_requests)
+                selected_room = self.rng.choice(selected_rooms_pool)
 
-            failed = len(self.failed_requests)
-            if failed == 0:
-                if attempt > 1:
-                    print(
-                        f"[System] Solved with 100% success on attempt {attempt}/{max_attempts}."
+                self.sections.append(
+                    Section(
+                        self._section_id(sub, i), sub, selected_teacher, selected_room
                     )
-                return
+                )
 
-            if best is None or failed < best["failed_count"]:
-                best = {
-                    "failed_count": failed,
-                    "failed_requests": copy.deepcopy(self.failed_requests),
-                    "student_schedules": copy.deepcopy(self.student_schedules),
-                    "sections": copy.deepcopy(self.sections),
-                    "section_plan": copy.deepcopy(section_plan),
-                }
+    def _section_id(self, sub, i):
+        sub_parts = sub.split()
+        prefix = (
+            (sub_parts[0][:3] + sub_parts[1][:2]) if len(sub_parts) > 1 else sub[:5]
+        )
+        return f"{prefix}-{i}"
+
+    def _place_sections(self, candidates):
+        n = len(candidates)
+        extended_ids = set(self.patterns_by_slot.get(("Mon", 5), []))
+
+        slot_members = defaultdict(list)
+        for i, p_id in enumerate(candidates):
+            for slot in self.patterns[p_id]:
+                slot_members[slot].append(i)
+
+        # Cost vectors are indexed by candidate position and updated only for
+        # the patterns touched by each committed section.
+        base_cost = [0] * n
+        reuse = [0] * n
+        extended_cost = [5000 if p_id in extended_ids else 0 for p_id in candidates]
+        teacher_cost = {}
+        room_cost = {}
+
+        sub_to_sections = defaultdict(list)
+        for sec in self.sections:
+            sub_to_sections[sec.subject].append(sec)
 
-            bottleneck_counts = {}
-            for fr in self.failed_requests:
-                sub = fr.get("failed_at")
-                bottleneck_counts[sub] = bottleneck_counts.get(sub, 0) + 1
+        for subject, sections in sub_to_sections.items():
+            single = len(sections) == 1
 
-            worst = sorted(bottleneck_counts.items(), key=lambda x: x[1], reverse=True)[
-                :3
-            ]
-            for sub, _cnt in worst:
-                if sub in counts:
-                    current = section_plan.get(sub, 2)
-                    cap = max(6, math.ceil(counts[sub] / 3) + 6)
-                    if current < cap:
-                        section_plan[sub] = current + 1
+            for sec in sections:
+                self.counters["patterns_scored"] += n
+                t_cost = teacher_cost.setdefault(sec.instructor.name, [0] * n)
+                r_cost = room_cost.setdefault(sec.room.number, [0] * n)
 
-        if best:
-            self.failed_requests = best["failed_requests"]
-            self.student_schedules = best["student_schedules"]
-            self.sections = best["sections"]
-            print(
-                f"[Warning] Could not reach 100% after {max_attempts} attempts. "
-                f"Best attempt still has {best['failed_count']} failures."
-            )
+                costs = list(map(add, base_cost, t_cost))
+                costs = list(map(add, costs, r_cost))
+                if single:
+                    costs = [
+                        c + u * 9000 + e for c, u, e in zip(costs, reuse, extended_cost)
+                    ]
+
+                min_cost = min(costs)
+                best_i = self.rng.choice(
+                    [i for i, c in enumerate(costs) if c == min_cost]
+                )
+                best_pattern = self.patterns[candidates[best_i]]
+                sec.slots = list(best_pattern)
+                sec.mask = self._slot_mask(best_pattern)
+
+                # Every booking adds to the clash cost, not just the first,
+                # so an overbooked teacher or room spreads its sections over
+                # the week instead of stacking them in one cheap pattern.
+                for slot in best_pattern:
+                    for i in slot_members[slot]:
+                        base_cost[i] += 1000
+                        t_cost[i] += 100000
+                        r_cost[i] += 100000
+
+                reuse[best_i] += 1
+                base_cost[best_i] += 2500
 
     def _assign_students(self, student_requests):
         self.failed_requests = []
 
         for sec in self.sections:
-            sec.students = []
+            sec.student_ids = array("I")
 
         all_subjects = set()
         for subs in student_requests.values():
             for s in subs:
                 all_subjects.add(s)
 
+        self._index_sections()
+
         subject_difficulty = {}
         for sub in all_subjects:
-            sections_available = [s for s in self.sections if s.subject == sub]
-            count = len(sections_available)
+            count = len(self.subject_sections.get(sub, []))
             subject_difficulty[sub] = 100 / count if count > 0 else 999
 
         sorted_names = sorted(student_requests.keys())
+        self.student_names = sorted_names
+
+        self.student_masks = {}
+        self.student_sections = {}
 
         for name in sorted_names:
-            self.student_schedules[name] = {
-                d: [None] * self.period_counts[d] for d in self.days
-            }
-            self.student_schedules[name]["Tue"][1] = "TUTOR"
-            self.student_schedules[name]["Fri"][5] = "FREE"
+            self.student_masks[name] = self.reserved_mask
+            self.student_sections[name] = []
 
             requested = sorted(
                 list(student_requests[name]),
@@ -302,60 +809,538 @@ class Scheduler(MasterSystem):
                 reverse=True,
             )
 
-            success, failed_sub = self._backtrack(name, requested, 0)
+            if self._out_of_time():
+                self.counters["timed_out_students"] += 1
+                success, failed_sub = False, None
+            else:
+                success, failed_sub = self._backtrack(name, requested, 0)
 
             if not success:
-                self.student_schedules[name] = None
+                self.student_sections[name] = None
                 self.failed_requests.append(
                     {"name": name, "failed_at": failed_sub, "all_requested": requested}
                 )
 
+    def _index_sections(self):
+        self.subject_sections = defaultdict(list)
+        self.remaining_capacity = {}
+        for sec in self.sections:
+            self.subject_sections[sec.subject].append(sec)
+            self.remaining_capacity[sec] = sec.room.capacity - len(sec.student_ids)
+
     def _backtrack(self, name, subjects, idx):
+        self.counters["backtrack_nodes"] += 1
         if idx == len(subjects):
             return True, None
 
         sub = subjects[idx]
-        potential = [s for s in self.sections if s.subject == sub]
-        random.shuffle(potential)
+        potential = list(self.subject_sections.get(sub, []))
+        self.rng.shuffle(potential)
+
+        occupied = self.student_masks[name]
+        sid = STUDENTS.id_for(name)
+        mon_p6 = self.slot_bits[("Mon", 5)]
+        other_last = self.other_last_mask
 
         for sec in potential:
-            if len(sec.students) < sec.room.capacity:
-                if all(
-                    self.student_schedules[name][d][p] is None for d, p in sec.slots
-                ):
-                    sec_has_mon_p6 = any(d == "Mon" and p == 5 for d, p in sec.slots)
-                    sec_has_other_last = any(
-                        d != "Mon" and d != "Fri" and p == (self.period_counts[d] - 1)
-                        for d, p in sec.slots
-                    )
-                    is_mon_p6_taken = self.student_schedules[name]["Mon"][5] is not None
-
-                    if sec_has_other_last and not sec_has_mon_p6:
-                        continue
-                    if (
-                        sec_has_mon_p6
-                        and is_mon_p6_taken
-                        and not self.student_schedules[name]["Mon"][5].startswith(sub)
-                    ):
-                        continue
+            if self.remaining_capacity[sec] <= 0:
+                self.counters["capacity_rejections"] += 1
+                continue
+            if not sec.mask & occupied:
+                if sec.mask & other_last and not sec.mask & mon_p6:
+                    self.counters["mon_p6_rejections"] += 1
+                    continue
+
+                self.student_masks[name] = occupied | sec.mask
+                self.student_sections[name].append(sec)
+                sec.add_student(sid)
+                self.remaining_capacity[sec] -= 1
+
+                success, deeper_fail = self._backtrack(name, subjects, idx + 1)
+                if success:
+                    return True, None
+
+                self.counters["backtracks_undone"] += 1
+                sec.remove_student(sid)
+                self.remaining_capacity[sec] += 1
+                self.student_sections[name].pop()
+                self.student_masks[name] = occupied
 
-                    for d, p in sec.slots:
-                        self.student_schedules[name][d][
-                            p
-                        ] = f"{sub} ({sec.room.number})"
+        return False, sub
+
+    def _assign_forward(self, student_requests):
+        self.failed_requests = []
 
-                    sec.students.append(name)
+        for sec in self.sections:
+            sec.student_ids = array("I")
 
-                    success, deeper_fail = self._backtrack(name, subjects, idx + 1)
-                    if success:
-                        return True, None
+        self._index_sections()
+
+        mon_p6 = self.slot_bits[("Mon", 5)]
+        usable = {}
+        for sub, sections in self.subject_sections.items():
+            usable[sub] = []
+            for sec in sections:
+                if sec.mask & self.other_last_mask and not sec.mask & mon_p6:
+                    self.counters["mon_p6_rejections"] += 1
+                else:
+                    usable[sub].append(sec)
+
+        def options(name):
+            count = 1
+            for sub in student_requests[name]:
+                count *= len(usable.get(sub, ()))
+            return count
+
+        self.student_names = sorted(student_requests.keys())
+        self.student_masks = {name: self.reserved_mask for name in self.student_names}
+        self.student_sections = {name: [] for name in self.student_names}
+
+        for name in sorted(self.student_names, key=options):
+            requested = list(student_requests[name])
+            domains = {}
+            for sub in requested:
+                domains[sub] = [
+                    sec
+                    for sec in usable.get(sub, ())
+                    if self.remaining_capacity[sec] > 0
+                ]
 
-                    sec.students.remove(name)
-                    for d, p in sec.slots:
-                        self.student_schedules[name][d][p] = None
+            if self._out_of_time():
+                self.counters["timed_out_students"] += 1
+                success, failed_sub = False, None
+            else:
+                success, failed_sub = self._forward_check(name, domains)
 
+            if not success:
+                self.student_sections[name] = None
+                self.failed_requests.append(
+                    {"name": name, "failed_at": failed_sub, "all_requested": requested}
+                )
+
+        self.failed_requests.sort(key=lambda fr: fr["name"])
+
+    def _forward_check(self, name, domains):
+        self.counters["backtrack_nodes"] += 1
+        if not domains:
+            return True, None
+
+        sub = min(domains, key=lambda s: len(domains[s]))
+        candidates = domains.pop(sub)
+        occupied = self.student_masks[name]
+        sid = STUDENTS.id_for(name)
+
+        ordered = list(candidates)
+        self.rng.shuffle(ordered)
+        ordered.sort(key=lambda sec: self.remaining_capacity[sec], reverse=True)
+
+        for sec in ordered:
+            if self.remaining_capacity[sec] <= 0:
+                self.counters["capacity_rejections"] += 1
+                continue
+
+            taken = occupied | sec.mask
+            pruned = {}
+            for other, secs in domains.items():
+                remaining = [s for s in secs if not s.mask & taken]
+                if not remaining:
+                    self.counters["forward_prunes"] += 1
+                    break
+                pruned[other] = remaining
+            else:
+                self.student_masks[name] = taken
+                self.student_sections[name].append(sec)
+                sec.add_student(sid)
+                self.remaining_capacity[sec] -= 1
+
+                success, deeper_fail = self._forward_check(name, pruned)
+                if success:
+                    return True, None
+
+                self.counters["backtracks_undone"] += 1
+                sec.remove_student(sid)
+                self.remaining_capacity[sec] += 1
+                self.student_sections[name].pop()
+                self.student_masks[name] = occupied
+
+        domains[sub] = candidates
         return False, sub
 
+    def _repair(self):
+        failed = self.failed_requests
+        self.failed_requests = []
+
+        teacher_busy = defaultdict(int)
+        room_busy = defaultdict(int)
+        for sec in self.sections:
+            teacher_busy[sec.instructor.name] |= sec.mask
+            room_busy[sec.room.number] |= sec.mask
+        added = 0
+        self.ejection_budget = self.REPAIR_EJECTION_LIMIT
+
+        for fr in failed:
+            if self._out_of_time():
+                self.failed_requests.append(fr)
+                continue
+            name = fr["name"]
+            requested = fr["all_requested"]
+            order = [fr["failed_at"]] + [s for s in requested if s != fr["failed_at"]]
+            self.student_sections[name] = []
+            self.student_masks[name] = self.reserved_mask
+
+            success, _ = self._backtrack(name, requested, 0)
+            if not success:
+                for sub in order:
+                    count = len(self.sections)
+                    sec = self._repair_with_section(
+                        name,
+                        requested,
+                        sub,
+                        teacher_busy,
+                        room_busy,
+                        added < self.REPAIR_SECTION_LIMIT,
+                        allow_eject=True,
+                    )
+                    if sec:
+                        added += len(self.sections) - count
+                        success = True
+                        break
+
+            if success:
+                self.counters["repaired_students"] += 1
+            else:
+                self.student_sections[name] = None
+                self.failed_requests.append(fr)
+
+    def _eject_into(self, sub, occupied):
+        # Free a seat only in a full section that fits around the student's
+        # other subjects. A move is made only when it yields that seat, so
+        # nothing needs rolling back.
+        mon_p6 = self.slot_bits[("Mon", 5)]
+        sections = self.subject_sections.get(sub, [])
+        for sec in sections:
+            if self.ejection_budget <= 0:
+                return None
+            if sec.mask & occupied or self.remaining_capacity[sec] > 0:
+                continue
+            if sec.mask & self.other_last_mask and not sec.mask & mon_p6:
+                continue
+            self.ejection_budget -= 1
+            if self._move_one_student(sec, sections):
+                self.counters["ejections"] += 1
+                return sec
+        return None
+
+    def _clear_student(self, name):
+        sid = STUDENTS.id_for(name)
+        for placed in self.student_sections[name]:
+            placed.remove_student(sid)
+            self.remaining_capacity[placed] += 1
+        self.student_sections[name] = []
+        self.student_masks[name] = self.reserved_mask
+
+    def _move_one_student(self, sec, sections):
+        mon_p6 = self.slot_bits[("Mon", 5)]
+        names = STUDENTS.names
+
+        for sid in reversed(sec.student_ids):
+            other = names[sid]
+            free = self.student_masks[other] & ~sec.mask
+            for alt in sections:
+                if alt is sec or self.remaining_capacity[alt] <= 0:
+                    continue
+                if alt.mask & free:
+                    continue
+                if alt.mask & self.other_last_mask and not alt.mask & mon_p6:
+                    continue
+
+                sec.remove_student(sid)
+                alt.add_student(sid)
+                self.remaining_capacity[sec] += 1
+                self.remaining_capacity[alt] -= 1
+                placed = self.student_sections[other]
+                placed[placed.index(sec)] = alt
+                self.student_masks[other] = free | alt.mask
+                return True
+        return False
+
+    def _repair_with_section(
+        self,
+        name,
+        requested,
+        sub,
+        teacher_busy,
+        room_busy,
+        allow_new,
+        allow_shift=True,
+        allow_eject=False,
+    ):
+        rest = [s for s in requested if s != sub]
+        success, _ = self._backtrack(name, rest, 0)
+        if not success:
+            return None
+
+        occupied = self.student_masks[name]
+        sec = None
+        if allow_eject:
+            sec = self._eject_into(sub, occupied)
+        if sec is None and allow_shift:
+            sec = self._shift_section(sub, occupied, teacher_busy, room_busy)
+        if sec is None and allow_new:
+            sec = self._add_section(sub, occupied, teacher_busy, room_busy)
+        if sec is None:
+            self._clear_student(name)
+            return None
+
+        sec.add_student(STUDENTS.id_for(name))
+        self.remaining_capacity[sec] -= 1
+        self.student_sections[name].append(sec)
+        self.student_masks[name] |= sec.mask
+        return sec
+
+    def _free_pattern(self, blocked):
+        slots = []
+        for d in self.days:
+            free = [
+                (d, p)
+                for p in range(self.period_counts[d] - 1)
+                if not self.slot_bits[(d, p)] & blocked
+            ]
+            if not free:
+                break
+            slots.append(self.rng.choice(free))
+        else:
+            return slots, self._slot_mask(slots)
+
+        slots = [(d, self.period_counts[d] - 1) for d in self.days if d != "Fri"]
+        mask = self._slot_mask(slots)
+        return (slots, mask) if not mask & blocked else None
+
+    def _shift_section(self, sub, occupied, teacher_busy, room_busy):
+        names = STUDENTS.names
+        sections = sorted(
+            (
+                s
+                for s in self.subject_sections.get(sub, [])
+                if self.remaining_capacity[s] > 0
+            ),
+            key=lambda s: len(s.student_ids),
+        )
+
+        for sec in sections:
+            teacher_other = 0
+            room_other = 0
+            for other in self.sections:
+                if other is sec:
+                    continue
+                if other.instructor.name == sec.instructor.name:
+                    teacher_other |= other.mask
+                if other.room.number == sec.room.number:
+                    room_other |= other.mask
+
+            blocked = occupied | self.reserved_mask | teacher_other | room_other
+            for sid in sec.student_ids:
+                blocked |= self.student_masks[names[sid]] & ~sec.mask
+
+            pattern = self._free_pattern(blocked)
+            if pattern:
+                slots, mask = pattern
+                for sid in sec.student_ids:
+                    name = names[sid]
+                    self.student_masks[name] = (
+                        self.student_masks[name] & ~sec.mask
+                    ) | mask
+                sec.slots = slots
+                sec.mask = mask
+                teacher_busy[sec.instructor.name] = teacher_other | mask
+                room_busy[sec.room.number] = room_other | mask
+                self.counters["pattern_swaps"] += 1
+                return sec
+        return None
+
+    def _add_section(self, sub, occupied, teacher_busy, room_busy):
+        resources = self.resource_index()
+        teachers = resources.teachers_for(sub)
+        rooms = resources.rooms_for(sub)
+        if not teachers or not rooms:
+            return None
+
+        teachers = sorted(teachers, key=lambda t: bin(teacher_busy[t.name]).count("1"))
+
+        blocked = occupied | self.reserved_mask
+        for teacher in teachers:
+            for room in rooms:
+                pattern = self._free_pattern(
+                    blocked | teacher_busy[teacher.name] | room_busy[room.number]
+                )
+                if pattern is None:
+                    continue
+
+                slots, mask = pattern
+                existing = self.subject_sections.setdefault(sub, [])
+                sec = Section(
+                    self._section_id(sub, len(existing) + 1), sub, teacher, room
+                )
+                sec.slots = slots
+                sec.mask = mask
+                existing.append(sec)
+                self.sections.append(sec)
+                self.remaining_capacity[sec] = room.capacity
+                teacher_busy[teacher.name] |= mask
+                room_busy[room.number] |= mask
+                self.counters["repair_sections"] += 1
+                return sec
+        return None
+
+    def apply_changes(self, adds=None, drops=None):
+        adds = adds or {}
+        drops = drops or {}
+        self._index_sections()
+
+        teacher_busy = defaultdict(int)
+        room_busy = defaultdict(int)
+        for sec in self.sections:
+            teacher_busy[sec.instructor.name] |= sec.mask
+            room_busy[sec.room.number] |= sec.mask
+
+        failed = {fr["name"]: fr for fr in self.failed_requests}
+        section_count = len(self.sections)
+        diff = {"enrolled": [], "withdrawn": [], "new_sections": [], "unplaced": []}
+        changed = sorted(set(adds) | set(drops))
+
+        for name in changed:
+            sid = STUDENTS.id_for(name)
+            before = list(self.student_sections.get(name) or [])
+            if name in failed:
+                requested = list(failed[name]["all_requested"])
+            else:
+                requested = [sec.subject for sec in before]
+            requested = [s for s in requested if s not in drops.get(name, ())]
+            requested += [s for s in adds.get(name, ()) if s not in requested]
+
+            kept = [sec for sec in before if sec.subject in requested]
+            self._withdraw(name, sid, before)
+            self._enrol(name, sid, kept)
+            missing = [s for s in requested if s not in {sec.subject for sec in kept}]
+
+            success = self._place_forward(name, missing)
+            for moved in kept if not success else []:
+                self._enrol(name, sid, [sec for sec in kept if sec is not moved])
+                success = self._place_forward(name, missing + [moved.subject])
+                if success:
+                    break
+            if not success:
+                self._withdraw(name, sid, self.student_sections[name])
+                success = self._place_forward(name, requested)
+            if not success:
+                for sub in missing:
+                    if self._repair_with_section(
+                        name,
+                        requested,
+                        sub,
+                        teacher_busy,
+                        room_busy,
+                        True,
+                        allow_shift=False,
+                    ):
+                        success = True
+                        break
+
+            if not success:
+                self._enrol(name, sid, kept)
+                placed = {sec.subject for sec in kept}
+                diff["unplaced"].extend(
+                    (name, sub) for sub in requested if sub not in placed
+                )
+
+            failed.pop(name, None)
+            if not requested:
+                del self.student_sections[name]
+                self.student_masks.pop(name, None)
+                self.student_schedules.pop(name, None)
+            elif not success:
+                # Keep the full request so a later change can retry the
+                # subjects that are still pending.
+                if not kept:
+                    self.student_sections[name] = None
+                failed[name] = {
+                    "name": name,
+                    "failed_at": missing[0] if missing else None,
+                    "all_requested": requested,
+                }
+
+            after = self.student_sections.get(name) or []
+            diff["withdrawn"].extend(
+                (name, sec.id) for sec in before if sec not in after
+            )
+            diff["enrolled"].extend(
+                (name, sec.id) for sec in after if sec not in before
+            )
+
+        diff["new_sections"] = [sec.id for sec in self.sections[section_count:]]
+        self.failed_requests = sorted(failed.values(), key=lambda fr: fr["name"])
+        self.student_names = sorted(self.student_sections.keys())
+        self._build_student_schedules(
+            [name for name in changed if name in self.student_sections]
+        )
+        return diff
+
+    def _place_forward(self, name, subjects):
+        occupied = self.student_masks[name]
+        mon_p6 = self.slot_bits[("Mon", 5)]
+        domains = {}
+        for sub in subjects:
+            domains[sub] = [
+                sec
+                for sec in self.subject_sections.get(sub, [])
+                if self.remaining_capacity[sec] > 0
+                and not sec.mask & occupied
+                and not (sec.mask & self.other_last_mask and not sec.mask & mon_p6)
+            ]
+            if not domains[sub]:
+                return False
+        return self._forward_check(name, domains)[0]
+
+    def _withdraw(self, name, sid, sections):
+        for sec in sections:
+            sec.remove_student(sid)
+            self.remaining_capacity[sec] += 1
+        self.student_sections[name] = []
+        self.student_masks[name] = self.reserved_mask
+
+    def _enrol(self, name, sid, sections):
+        if self.student_sections.get(name):
+            self._withdraw(name, sid, self.student_sections[name])
+        self.student_sections[name] = []
+        self.student_masks[name] = self.reserved_mask
+        for sec in sections:
+            sec.add_student(sid)
+            self.remaining_capacity[sec] -= 1
+            self.student_sections[name].append(sec)
+            self.student_masks[name] |= sec.mask
+
+    def _build_student_schedules(self, names=None):
+        if names is None:
+            self.student_schedules = {}
+            names = self.student_sections
+        labels = {}
+        for name in names:
+            sections = self.student_sections[name]
+            if sections is None:
+                self.student_schedules[name] = None
+                continue
+
+            grid = {d: [None] * self.period_counts[d] for d in self.days}
+            grid["Tue"][1] = "TUTOR"
+            grid["Fri"][5] = "FREE"
+            for sec in sections:
+                label = labels.get(sec)
+                if label is None:
+                    label = labels[sec] = f"{sec.subject} ({sec.room.number})"
+                for d, p in sec.slots:
+                    grid[d][p] = label
+            self.student_schedules[name] = grid
+
     def print_timetable(self, name):
         if name not in self.student_schedules or not self.student_schedules[name]:
             print(f"No schedule for {name}")
@@ -375,7 +1360,7 @@ class Scheduler(MasterSystem):
                     row.append("-")
             table_data.append(row)
 
-        print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+        print(box_grid(headers, table_data))
 
     def print_teacher_timetable(self, teacher_name):
         teacher_grids = getattr(self, "teacher_grids", {})
@@ -389,10 +1374,13 @@ class Scheduler(MasterSystem):
                 row = [f"P{p+1}"]
                 for d in self.days:
                     val = teacher_grids[teacher_name][d][p]
-                    row.append(val if val else "---")
+                    if p < self.period_counts[d]:
+                        row.append(val if val else "---")
+                    else:
+                        row.append("-")
                 table_data.append(row)
 
-            print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+            print(box_grid(headers, table_data))
             return
 
         sched = {d: [None] * self.period_counts[d] for d in self.days}
@@ -401,7 +1389,7 @@ class Scheduler(MasterSystem):
             s for s in self.sections if s.instructor.name == teacher_name
         ]
 
-        if not teacher_sections:
+        if not teacher_sections and teacher_name not in {t.name for t in self.teachers}:
             print(f"[Error] No classes found for teacher: {teacher_name}")
             return
 
@@ -409,7 +1397,7 @@ class Scheduler(MasterSystem):
             for d, p in sec.slots:
                 sched[d][
                     p
-                ] = f"{sec.subject}\n({sec.room.number})\nSt: {len(sec.students)}"
+                ] = f"{sec.subject}\n({sec.room.number})\nStudents: {len(sec.student_ids)}"
 
         print(f"\n--- TEACHER TIMETABLE: {teacher_name.upper()} ---")
         headers = ["Period"] + self.days
@@ -424,64 +1412,240 @@ class Scheduler(MasterSystem):
                     row.append("-")
             table_data.append(row)
 
-        print(tabulate(table_data, headers=headers, tablefmt="fancy_grid"))
+        print(box_grid(headers, table_data))
+
+    def _run_header(self):
+        fields = " ".join(f"{k}={v}" for k, v in self.run_info.items())
+        return f"# Run: {fields}\n"
 
-    def save_all_data(self):
-        with open("./output/roll_calls.txt", "w") as f:
-            for sec in sorted(self.sections, key=lambda x: x.subject):
-                f.write(
-                    f"\nID: {sec.id} | {sec.subject} | {sec.instructor.name} | {sec.room.number}\n"
+    def write_run_report(self, path):
+        report = {
+            "run": self.run_info,
+            "sections": len(self.sections),
+            "failed_requests": len(self.failed_requests),
+            "metrics": self.metrics,
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def load_store(self, path, read_only=False, **lookup):
+        # A lookup (student=, teacher= or section=) reads only the matching
+        # records through the store's index and implies read_only.
+        if lookup:
+            index = index_store(path)
+            store = read_store_records(path, index, **lookup) if index else None
+        else:
+            store = read_store(path)
+        if store is None:
+            return False
+
+        resources = self.resource_index()
+        teachers = resources.teachers_by_name
+        rooms = resources.rooms_by_number
+
+        self.run_info = store["run"]
+        self.sections = []
+        self.student_sections = {}
+
+        for record in store["sections"]:
+            instructor = teachers.get(record["teacher"])
+            if instructor is None:
+                instructor = Instructor(record["teacher"], [record["subject"]])
+            room = rooms.get(record["room"])
+            if room is None:
+                room = Room(record["room"], "Unknown", 30)
+
+            sec = Section(record["id"], record["subject"], instructor, room)
+            sec.slots = record["slots"]
+            sec.mask = self._slot_mask(sec.slots)
+            sec.students = record["students"]
+            for name in record["students"]:
+                self.student_sections.setdefault(name, []).append(sec)
+            self.sections.append(sec)
+
+        self.failed_requests = store["failed"]
+        for fr in self.failed_requests:
+            self.student_sections.setdefault(fr["name"], None)
+
+        self.student_names = sorted(self.student_sections.keys())
+        self.student_masks = {}
+        self.student_schedules = {}
+        if read_only or lookup:
+            return True
+
+        for name, sections in self.student_sections.items():
+            if sections is not None:
+                mask = self.reserved_mask
+                for sec in sections:
+                    mask |= sec.mask
+                self.student_masks[name] = mask
+
+        self._build_student_schedules()
+        return True
+
+    def _render_grid(self, rows, renderer, widths):
+        headers = ["Period"] + self.days
+        if renderer == "plain":
+            return plain_grid(headers, rows, widths)
+
+        from tabulate import tabulate
+
+        return tabulate(list(rows), headers=headers, tablefmt="grid")
+
+    def _roll_call_blocks(self):
+        for sec in sorted(self.sections, key=lambda x: x.subject):
+            yield (
+                f"\nID: {sec.id} | {sec.subject} | {sec.instructor.name} | {sec.room.number}\n"
+                f"Students: {', '.join(sorted(sec.students))}\n"
+            )
+
+    def _student_rows(self, schedule):
+        for p in range(7):
+            line = [f"P{p+1}"]
+            for d in self.days:
+                line.append(str(schedule[d][p] if p < self.period_counts[d] else "-"))
+            yield line
+
+    def _student_blocks(self, renderer):
+        widths = None
+        if renderer == "plain":
+            cells = {"None", "TUTOR", "FREE", "-"}
+            if self.sections:
+                cells.update(
+                    f"{sec.subject} ({sec.room.number})" for sec in self.sections
                 )
-                f.write(f"Students: {', '.join(sorted(sec.students))}\n")
+            else:
+                for schedule in self.student_schedules.values():
+                    if schedule:
+                        cells.update(str(v) for d in self.days for v in schedule[d])
+            width = max(len(d) + 2 for d in self.days)
+            width = max([width] + [len(c) for c in cells])
+            widths = [len("Period") + 2] + [width] * len(self.days)
+
+        for name in sorted(self.student_schedules.keys()):
+            schedule = self.student_schedules[name]
+            if not schedule:
+                continue
+            grid = self._render_grid(self._student_rows(schedule), renderer, widths)
+            yield f"\nSTUDENT: {name}\n{grid}\n"
+
+    def _teacher_rows(self, teacher_sched):
+        for p in range(7):
+            row = [f"P{p+1}"]
+            for d in self.days:
+                if p < self.period_counts[d]:
+                    row.append(teacher_sched[d][p] or "---")
+                else:
+                    row.append("-")
+            yield row
 
-        with open("./output/student_timetables.txt", "w") as f:
-            for name in sorted(self.student_schedules.keys()):
-                if not self.student_schedules[name]:
-                    continue
-                f.write(f"\nSTUDENT: {name}\n")
-                headers = ["Period"] + self.days
-                table_data = []
-                for p in range(7):
-                    line = [f"P{p+1}"]
-                    for d in self.days:
-                        line.append(
-                            str(
-                                self.student_schedules[name][d][p]
-                                if p < self.period_counts[d]
-                                else "-"
-                            )
-                        )
-                    table_data.append(line)
-                f.write(tabulate(table_data, headers=headers, tablefmt="grid") + "\n")
+    def _teacher_blocks(self, renderer):
+        sections_by_teacher = defaultdict(list)
+        for sec in self.sections:
+            sections_by_teacher[sec.instructor.name].append(sec)
 
-        with open("./output/teacher_timetables.txt", "w") as f:
-            for teacher in sorted(self.teachers, key=lambda t: t.name):
-                f.write(f"\n{'='*30}\nINSTRUCTOR: {teacher.name}\n{'='*30}\n")
+        widths = None
+        if renderer == "plain":
+            width = max(len(d) + 2 for d in self.days)
+            for sec in self.sections:
+                width = max(
+                    width,
+                    len(sec.subject),
+                    len(sec.room.number) + 2,
+                    len(f"Students: {len(sec.student_ids)}"),
+                )
+            widths = [len("Period") + 2] + [width] * len(self.days)
+
+        for teacher in sorted(self.teachers, key=lambda t: t.name):
+            teacher_sched = {d: [None] * self.period_counts[d] for d in self.days}
+            for sec in sections_by_teacher.get(teacher.name, []):
+                for d, p in sec.slots:
+                    teacher_sched[d][
+                        p
+                    ] = f"{sec.subject}\n({sec.room.number})\nStudents: {len(sec.student_ids)}"
+
+            grid = self._render_grid(
+                self._teacher_rows(teacher_sched), renderer, widths
+            )
+            yield f"\n{'='*30}\nINSTRUCTOR: {teacher.name}\n{'='*30}\n{grid}\n\n"
+
+    def save_all_data(self, output_dir="./output", database=False, renderer="tabulate"):
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        header = self._run_header()
+        outputs = {
+            STORE_NAME: store_blocks(
+                self.run_info, self.sections, self.failed_requests
+            ),
+            "roll_calls.txt": itertools.chain([header], self._roll_call_blocks()),
+            "student_timetables.txt": itertools.chain(
+                [header], self._student_blocks(renderer)
+            ),
+            "teacher_timetables.txt": itertools.chain(
+                [header], self._teacher_blocks(renderer)
+            ),
+        }
 
-                teacher_sched = {d: [None] * self.period_counts[d] for d in self.days}
-                teacher_sections = [
-                    s for s in self.sections if s.instructor.name == teacher.name
-                ]
+        from concurrent.futures import ThreadPoolExecutor
 
-                for sec in teacher_sections:
-                    for d, p in sec.slots:
-                        teacher_sched[d][
-                            p
-                        ] = f"{sec.subject}\n({sec.room.number})\nStudents: {len(sec.students)}"
-
-                headers = ["Period"] + self.days
-                table_data = []
-                for p in range(7):
-                    row = [f"P{p+1}"]
-                    for d in self.days:
-                        if p < self.period_counts[d]:
-                            row.append(teacher_sched[d][p] or "---")
-                        else:
-                            row.append("-")
-                    table_data.append(row)
-
-                f.write(tabulate(table_data, headers=headers, tablefmt="grid") + "\n\n")
+        with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+            futures = {
+                name: pool.submit(
+                    atomic_write,
+                    os.path.join(output_dir, name),
+                    blocks,
+                    self.WRITE_CHUNK,
+                    self.WRITE_BUFFER,
+                )
+                for name, blocks in outputs.items()
+            }
+            files = {name: future.result() for name, future in futures.items()}
+
+        if database:
+            write_database(
+                os.path.join(output_dir, DB_NAME),
+                self.run_info,
+                self.sections,
+                self.failed_requests,
+                self.teachers,
+                self.rooms,
+            )
+
+        if self.metrics:
+            self.write_run_report(os.path.join(output_dir, "run_report.json"))
+
+        write_manifest(output_dir, self.run_info, files)
 
         print(
-            "[System] Reports generated: roll_calls.txt, teacher_timetables.txt, and student_timetables.txt"
+            f"[System] Reports generated: {STORE_NAME}, roll_calls.txt, teacher_timetables.txt, student_timetables.txt and run_report.json"
         )
+
+
+_worker_state = {}
+
+
+def _init_attempt_worker(rooms, teachers, student_requests, strategy, repair, deadline):
+    school = Scheduler()
+    school.rooms = rooms
+    school.teachers = teachers
+    school.strategy = strategy
+    school.repair = repair
+    if deadline is not None:
+        school._stop_at = time.perf_counter() + (deadline - time.time())
+
+    counts, _ = school._plan_sections(student_requests)
+
+    _worker_state["school"] = school
+    _worker_state["student_requests"] = student_requests
+    _worker_state["counts"] = counts
+
+
+def _run_attempt_worker(args):
+    section_plan, seed = args
+    school = _worker_state["school"]
+    school.rng = random.Random(seed)
+    return school._run_attempt(
+        _worker_state["student_requests"], _worker_state["counts"], section_plan
+    )
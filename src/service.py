@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+from .scheduler import Scheduler
+from .store import STORE_NAME
+from .database import teacher_lookup
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+class TimetableService:
+    def __init__(self, output_dir, teachers, rooms, poll_interval=2.0):
+        self.store_path = os.path.join(output_dir, STORE_NAME)
+        self.teachers = teachers
+        self.rooms = rooms
+        self.poll_interval = poll_interval
+        self.school = None
+        self.loaded_mtime = None
+
+    def load(self):
+        if not os.path.exists(self.store_path):
+            return False
+
+        mtime = os.stat(self.store_path).st_mtime_ns
+        school = Scheduler()
+        school.teachers = self.teachers
+        school.rooms = self.rooms
+        if not school.load_store(self.store_path):
+            return False
+
+        by_id = {}
+        by_teacher = defaultdict(list)
+        by_student = defaultdict(list)
+        for sec in school.sections:
+            by_id[sec.id] = sec
+            by_teacher[teacher_lookup(sec.instructor.name)].append(sec)
+            for name in sec.students:
+                by_student[name].append(sec)
+
+        self.students = {name.lower(): name for name in school.student_schedules}
+        self.by_id = by_id
+        self.by_teacher = dict(by_teacher)
+        self.by_student = dict(by_student)
+        self.school = school
+        self.loaded_mtime = mtime
+
+        print(
+            f"[Service] Loaded {len(school.sections)} sections and {len(self.students)} students."
+        )
+        return True
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                mtime = os.stat(self.store_path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime != self.loaded_mtime:
+                self.load()
+
+    def _section_info(self, sec, with_students=False):
+        info = {
+            "id": sec.id,
+            "subject": sec.subject,
+            "teacher": sec.instructor.name,
+            "room": sec.room.number,
+            "slots": [list(slot) for slot in sec.slots],
+            "student_count": len(sec.student_ids),
+        }
+        if with_students:
+            info["students"] = sorted(sec.students)
+        return info
+
+    def student(self, name):
+        match = self.students.get(name.lower())
+        schedule = self.school.student_schedules.get(match)
+        if schedule is None:
+            return None
+        return {"name": match, "timetable": schedule}
+
+    def teacher(self, name):
+        sections = self.by_teacher.get(teacher_lookup(name))
+        if not sections:
+            return None
+        return {
+            "name": sections[0].instructor.name,
+            "sections": [self._section_info(sec) for sec in sections],
+        }
+
+    def roll(self, class_id):
+        sec = self.by_id.get(class_id)
+        return self._section_info(sec, with_students=True) if sec else None
+
+    def search(self, name):
+        sections = self.by_student.get(name)
+        if not sections:
+            return None
+        return {
+            "name": name,
+            "classes": [
+                {"id": s.id, "subject": s.subject, "teacher": s.instructor.name}
+                for s in sections
+            ],
+        }
+
+    def handle(self, path, query):
+        if path == "/health":
+            return 200, {
+                "loaded": self.school is not None,
+                "sections": len(self.by_id) if self.school else 0,
+            }
+        if self.school is None:
+            return 503, {"error": f"no {STORE_NAME} loaded"}
+
+        routes = {
+            "/student": ("name", self.student),
+            "/teacher": ("name", self.teacher),
+            "/roll": ("id", self.roll),
+            "/search": ("name", self.search),
+        }
+        if path not in routes:
+            return 404, {"error": f"unknown endpoint {path}"}
+
+        param, lookup = routes[path]
+        value = query.get(param, [""])[0].strip()
+        if not value:
+            return 400, {"error": f"missing '{param}' parameter"}
+
+        result = lookup(value)
+        if result is None:
+            return 404, {"error": f"nothing found for '{value}'"}
+        return 200, result
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body = 405, {"error": "only GET is supported"}
+            else:
+                url = urlsplit(parts[1])
+                status, body = self.handle(url.path, parse_qs(url.query))
+
+            payload = json.dumps(body).encode("utf-8")
+            reason = REASONS.get(status, "Error")
+            writer.write(
+                f"HTTP/1.1 {status} {reason}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, socket_path=None):
+        if socket_path:
+            server = await asyncio.start_unix_server(
+                self._handle_connection, path=socket_path
+            )
+            print(f"[Service] Listening on unix socket {socket_path}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            print(f"[Service] Listening on http://{host}:{port}")
+
+        watcher = asyncio.create_task(self.watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
@@ -0,0 +1,147 @@
+import json
+import os
+from itertools import chain
+from .utils import atomic_write
+
+STORE_NAME = "timetable.jsonl"
+STORE_VERSION = 1
+
+
+def store_blocks(run_info, sections, failed_requests):
+    yield json.dumps({"type": "run", "version": STORE_VERSION, **run_info}) + "\n"
+
+    for sec in sections:
+        yield json.dumps(
+            {
+                "type": "section",
+                "id": sec.id,
+                "subject": sec.subject,
+                "teacher": sec.instructor.name,
+                "room": sec.room.number,
+                "slots": sec.slots,
+                "students": sec.students,
+            }
+        ) + "\n"
+
+    for fr in failed_requests:
+        yield json.dumps({"type": "failed", **fr}) + "\n"
+
+
+def read_store(path):
+    if not os.path.exists(path):
+        return None
+
+    store = {"version": None, "run": {}, "sections": [], "failed": []}
+
+    with open(path, "r") as f:
+        data = f.read()
+
+    for line in data.splitlines():
+        if line:
+            _add_record(store, *_parse_record(line, path))
+
+    return store
+
+
+def _parse_record(line, path):
+    record = json.loads(line)
+    kind = record.pop("type")
+    if kind == "run" and record.get("version") != STORE_VERSION:
+        raise ValueError(
+            f"Unsupported {STORE_NAME} version {record.get('version')!r} in {path}"
+        )
+    if kind == "section":
+        record["slots"] = [tuple(slot) for slot in record["slots"]]
+    return kind, record
+
+
+def _add_record(store, kind, record):
+    if kind == "run":
+        store["version"] = record.pop("version", None)
+        store["run"] = record
+    elif kind == "section":
+        store["sections"].append(record)
+    elif kind == "failed":
+        store["failed"].append(record)
+
+
+def _scan_store(path):
+    index = {"run": None, "sections": {}, "students": {}, "teachers": {}, "failed": {}}
+
+    with open(path, "rb") as f:
+        start = 0
+        for line in f:
+            end = start + len(line)
+            if line.strip():
+                kind, record = _parse_record(line, path)
+                span = (start, end)
+                if kind == "run":
+                    index["run"] = span
+                elif kind == "section":
+                    index["sections"][record["id"]] = span
+                    index["teachers"].setdefault(record["teacher"], []).append(
+                        record["id"]
+                    )
+                    for name in record["students"]:
+                        index["students"].setdefault(name, []).append(record["id"])
+                elif kind == "failed":
+                    index["failed"][record["name"]] = span
+            start = end
+
+    return index
+
+
+def index_store(path):
+    if not os.path.exists(path):
+        return None
+
+    stat = os.stat(path)
+    index_path = path + ".idx"
+    key = {"version": STORE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                return cached["index"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = _scan_store(path)
+
+    try:
+        atomic_write(index_path, [json.dumps({"key": key, "index": index})])
+    except OSError:
+        pass
+    return index
+
+
+def read_store_records(path, index, student=None, teacher=None, section=None):
+    placed, failed = index["students"], index["failed"]
+    if student is not None and student not in placed and student not in failed:
+        student = next(
+            (k for k in chain(placed, failed) if k.lower() == student.lower()),
+            student,
+        )
+
+    ids = []
+    if student is not None:
+        ids += placed.get(student, [])
+    if teacher is not None:
+        ids += index["teachers"].get(teacher, [])
+    if section in index["sections"]:
+        ids.append(section)
+
+    spans = [index["run"]] if index["run"] else []
+    spans += [index["sections"][i] for i in dict.fromkeys(ids)]
+    if student in failed:
+        spans.append(failed[student])
+
+    store = {"version": None, "run": {}, "sections": [], "failed": []}
+    with open(path, "rb") as f:
+        for start, end in spans:
+            f.seek(start)
+            _add_record(store, *_parse_record(f.read(end - start), path))
+
+    return store
@@ -1,72 +1,314 @@
 import os
-from src.models import Section
+import sys
+import json
+import hashlib
+import mmap
+from src.models import Room, Instructor, Section
 
+MANIFEST_NAME = "manifest.json"
 
-def rebuild_sections_from_file(file_path, teachers_list, rooms_list):
+
+def _write_encoded(f, digest, chunk):
+    data = "".join(chunk).encode("utf-8")
+    digest.update(data)
+    f.write(data)
+    return len(data)
+
+
+def atomic_write(path, blocks, chunk_size=256, buffering=1 << 20):
+    tmp_path = f"{path}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(tmp_path, "wb", buffering=buffering) as f:
+            chunk = []
+            for block in blocks:
+                chunk.append(block)
+                if len(chunk) >= chunk_size:
+                    size += _write_encoded(f, digest, chunk)
+                    chunk = []
+            size += _write_encoded(f, digest, chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"sha256": digest.hexdigest(), "bytes": size}
+
+
+def write_manifest(output_dir, run_info, files):
+    manifest = {"complete": True, "run": run_info, "files": files}
+    atomic_write(
+        os.path.join(output_dir, MANIFEST_NAME), [json.dumps(manifest, indent=2)]
+    )
+
+
+def verify_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return [f"{MANIFEST_NAME} not found"]
+
+    with open(path, "r") as f:
+        manifest = json.load(f)
+
+    problems = []
+    if not manifest.get("complete"):
+        problems.append("report generation did not complete")
+
+    for name, info in manifest.get("files", {}).items():
+        file_path = os.path.join(output_dir, name)
+        if not os.path.exists(file_path):
+            problems.append(f"{name} is missing")
+            continue
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        if digest.hexdigest() != info["sha256"]:
+            problems.append(f"{name} does not match its recorded hash")
+
+    return problems
+
+
+def plain_grid(headers, rows, widths):
+    border = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+
+    def render_row(cells):
+        split = [str(c).split("\n") for c in cells]
+        height = max(len(lines) for lines in split)
+        out = []
+        for i in range(height):
+            parts = [
+                f" {(lines[i] if i < len(lines) else ''):<{w}} "
+                for lines, w in zip(split, widths)
+            ]
+            out.append("|" + "|".join(parts) + "|")
+        return "\n".join(out)
+
+    lines = [border, render_row(headers), border.replace("-", "=")]
+    for row in rows:
+        lines.append(render_row(row))
+        lines.append(border)
+    return "\n".join(lines)
+
+
+def box_grid(headers, rows):
+    head = [str(h).split("\n") for h in headers]
+    body = [[str(c).split("\n") for c in row] for row in rows]
+    widths = [len(h) + 2 for h in headers]
+    for row in body:
+        for i, lines in enumerate(row):
+            widths[i] = max(widths[i], max(len(line) for line in lines))
+
+    def rule(left, fill, mid, right):
+        return left + mid.join(fill * (w + 2) for w in widths) + right
+
+    def render_row(split):
+        height = max(len(lines) for lines in split)
+        return "\n".join(
+            "│"
+            + "│".join(
+                f" {(lines[i] if i < len(lines) else ''):<{w}} "
+                for lines, w in zip(split, widths)
+            )
+            + "│"
+            for i in range(height)
+        )
+
+    lines = [rule("╒", "═", "╤", "╕"), render_row(head), rule("╞", "═", "╪", "╡")]
+    for row in body:
+        lines.append(render_row(row))
+        lines.append(rule("├", "─", "┼", "┤"))
+    lines[-1] = rule("╘", "═", "╧", "╛")
+    return "\n".join(lines)
+
+
+def iter_sections_from_file(
+    file_path, teachers_list, rooms_list, subject=None, teacher=None
+):
     if not os.path.exists(file_path):
-        return []
+        return
 
-    sections = []
-    with open(file_path, "r") as f:
-        lines = f.readlines()
+    teachers = {t.name: t for t in teachers_list}
+    rooms = {r.number: r for r in rooms_list}
+    intern = sys.intern
 
     current_sec = None
-    for line in lines:
-        if line.startswith("ID:"):
-            parts = [p.strip() for p in line.split("|")]
-            sec_id = parts[0].replace("ID:", "").strip()
-            subject = parts[1]
-            t_name = parts[2]
-            r_num = parts[3]
+    with open(file_path, "r") as f:
+        for line in f:
+            if line.startswith("ID:"):
+                if current_sec:
+                    yield current_sec
+                    current_sec = None
 
-            instructor = next((t for t in teachers_list if t.name == t_name), None)
-            room = next((r for r in rooms_list if r.number == r_num), None)
+                parts = [p.strip() for p in line.split("|")]
+                sec_subject = intern(parts[1])
+                t_name = intern(parts[2])
 
-            if instructor is None:
-                from src.models import Instructor
+                if subject is not None and sec_subject != subject:
+                    continue
+                if teacher is not None and t_name != teacher:
+                    continue
 
-                instructor = Instructor(t_name, [subject])
+                sec_id = parts[0].replace("ID:", "").strip()
+                r_num = intern(parts[3])
 
-            if room is None:
-                from src.models import Room
+                instructor = teachers.get(t_name)
+                if instructor is None:
+                    instructor = Instructor(t_name, [sec_subject])
+                    teachers[t_name] = instructor
 
-                room = Room(r_num, "Unknown", 30)
+                room = rooms.get(r_num)
+                if room is None:
+                    room = Room(r_num, "Unknown", 30)
+                    rooms[r_num] = room
 
-            current_sec = Section(sec_id, subject, instructor, room)
-            sections.append(current_sec)
+                current_sec = Section(sec_id, sec_subject, instructor, room)
 
-        elif line.startswith("Students:") and current_sec:
-            student_list = [
-                s.strip() for s in line.replace("Students:", "").split(",") if s.strip()
-            ]
-            current_sec.students = student_list
+            elif line.startswith("Students:") and current_sec:
+                current_sec.students = [
+                    intern(s.strip())
+                    for s in line.replace("Students:", "").split(",")
+                    if s.strip()
+                ]
 
-    return sections
+    if current_sec:
+        yield current_sec
 
 
-def import_student_timetables(file_path):
+def rebuild_sections_from_file(
+    file_path, teachers_list, rooms_list, subject=None, teacher=None
+):
+    return list(
+        iter_sections_from_file(file_path, teachers_list, rooms_list, subject, teacher)
+    )
+
+
+def read_run_header(file_path):
     if not os.path.exists(file_path):
         return {}
 
-    schedules = {}
-    current_student = None
+    with open(file_path, "r") as f:
+        line = f.readline()
+
+    if not line.startswith("# Run:"):
+        return {}
+
+    info = {}
+    for field in line.replace("# Run:", "").split():
+        key, _, value = field.partition("=")
+        info[key] = int(value) if value.isdigit() else value
+    return info
+
+
+def _parse_student_block(lines):
     days = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+    schedule = {d: [None] * 7 for d in days}
 
-    with open(file_path, "r") as f:
-        for line in f:
-            if line.startswith("STUDENT:"):
-                current_student = line.split(":")[1].strip()
-                schedules[current_student] = {d: [None] * 7 for d in days}
-            elif current_student and "|" in line and "Period" not in line:
-                parts = [p.strip() for p in line.split("|") if p.strip()]
-                if parts and parts[0].startswith("P"):
-                    p_idx = int(parts[0][1:]) - 1
-                    for i, day in enumerate(days):
-                        val = parts[i + 1]
-                        schedules[current_student][day][p_idx] = (
-                            None if val in ["None", "FREE", "-", "---"] else val
-                        )
-    return schedules
+    for line in lines:
+        if "|" in line and "Period" not in line:
+            parts = [p.strip() for p in line.split("|") if p.strip()]
+            if parts and parts[0].startswith("P"):
+                p_idx = int(parts[0][1:]) - 1
+                for i, day in enumerate(days):
+                    val = parts[i + 1]
+                    schedule[day][p_idx] = (
+                        None if val in ["None", "FREE", "-", "---"] else val
+                    )
+    return schedule
+
+
+def _scan_student_offsets(mm):
+    offsets = {}
+    marker = b"\nSTUDENT:"
+    pos = 0 if mm[:8] == b"STUDENT:" else mm.find(marker)
+    current = None
+
+    while pos != -1:
+        start = pos if mm[pos : pos + 1] != b"\n" else pos + 1
+        line_end = mm.find(b"\n", start)
+        if line_end == -1:
+            line_end = len(mm)
+        name = mm[start:line_end].decode("utf-8").split(":", 1)[1].strip()
+
+        if current:
+            offsets[current[0]] = (current[1], start)
+        current = (name, start)
+        pos = mm.find(marker, line_end)
+
+    if current:
+        offsets[current[0]] = (current[1], len(mm))
+    return offsets
+
+
+def index_student_timetables(file_path):
+    if not os.path.exists(file_path):
+        return {}
+
+    stat = os.stat(file_path)
+    index_path = file_path + ".idx"
+    key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                return {name: tuple(span) for name, span in cached["offsets"].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if stat.st_size == 0:
+        return {}
+
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets = _scan_student_offsets(mm)
+
+    try:
+        atomic_write(index_path, [json.dumps({"key": key, "offsets": offsets})])
+    except OSError:
+        pass
+    return offsets
+
+
+def _read_student_block(mm, span):
+    start, end = span
+    lines = mm[start:end].decode("utf-8").splitlines()
+    return _parse_student_block(lines[1:])
+
+
+def find_student_timetable(file_path, name):
+    offsets = index_student_timetables(file_path)
+    match = name if name in offsets else None
+    if match is None:
+        match = next((k for k in offsets if k.lower() == name.lower()), None)
+    if match is None:
+        return None, None
+
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return match, _read_student_block(mm, offsets[match])
+
+
+def iter_student_timetables(file_path):
+    offsets = index_student_timetables(file_path)
+    if not offsets:
+        return
+
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for name, span in offsets.items():
+                yield name, _read_student_block(mm, span)
+
+
+def import_student_timetables(file_path):
+    return dict(iter_student_timetables(file_path))
 
 
 def import_teacher_timetables(file_path):